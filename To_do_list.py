@@ -1,20 +1,316 @@
 import tkinter as tk
-from tkinter import messagebox, ttk
+from tkinter import filedialog, messagebox, ttk
+import argparse
+import bisect
 import datetime
-import json
 import os
+import queue
+import sqlite3
+import threading
+import time
 from tkinter.font import Font
 
+from task_history import UndoHistory
+from task_index import DUE_PLACEHOLDER
+from task_profiling import PROFILE_ENV, make_profiler
+from task_server import DEFAULT_HOST, DEFAULT_PORT, ChangeFeed, TaskApi, TaskServer, TkBridge, bind
+from task_storage import (STORAGE_BACKENDS, TASKS_FILE, clean_records, open_storage,
+                          parse_task_lines, read_task_records)
+from task_store import CATEGORIES, DUE_FILTERS, PRIORITIES, REPEAT_RULES, TaskStore
+
+
+# Task lists at least this long are shown in virtualized mode
+VIRTUAL_LIST_THRESHOLD = 2000
+
+# Row styles shared by every task row, configured once as Treeview tags
+ROW_STYLES = {
+    "completed": {"background": "#A5D6A7"},
+    "overdue": {"background": "#FFCDD2"},
+    "high": {"background": "#FFEBEE"},
+    "medium": {"background": "#FFF8E1"},
+    "low": {"background": "#FFFFFF"},
+}
+
+# How often the UI picks up loaded chunks (ms), and for how long (s)
+LOAD_POLL_INTERVAL = 15
+LOAD_POLL_BUDGET = 0.01
+
+# Search runs once typing pauses for this long (ms)
+SEARCH_DELAY = 120
+
+# How often to look for tasks other windows saved to the same file (ms)
+EXTERNAL_POLL_INTERVAL = 1000
+
+# Pending changes are written after this much idle time (ms)...
+SAVE_IDLE_DELAY = 500
+# ...but never held back longer than this while changes keep coming (s)
+SAVE_MAX_DELAY = 5.0
+
+# Methods timed when profiling is on, and how often their timings are shown (ms)
+PROFILED_METHODS = ("add_task", "remove_task", "mark_as_done", "filter_tasks", "update_stats", "refresh",
+                    "save_tasks_to_file", "load_tasks_from_file")
+PROFILE_PANEL_INTERVAL = 1000
+
+# How long a status message stays up (ms)
+TOAST_DURATION = 2000
+
+# Pending tasks are reminded of at this time on their due day, in one
+# message listing the first few titles and staying up this long (ms)
+REMINDER_TIME = datetime.time(9, 0)
+REMINDER_TITLES = 3
+REMINDER_DURATION = 10000
+
+# The timer sleeps until the next occurrence or reminder is due, but wakes
+# at least this often (ms), so a suspended machine or a changed clock catches up
+MAX_TIMER_DELAY = 60 * 60 * 1000
+
+
+class VirtualTaskList:
+    """Show a long task sequence through a small pool of recycled Treeview rows
+
+    Only the rows in the visible window (plus a few overscan rows) exist as
+    Treeview items. Scrolling rebinds those items to different tasks instead of
+    creating new ones, while the scrollbar reflects the full sequence length.
+    """
+
+    def __init__(self, tree, scrollbar, render_row, overscan=5):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.render_row = render_row
+        self.overscan = overscan
+        self.rows = []
+        self.first = 0
+        self.row_height = 20
+        self.header_height = 25
+        self.pool = []
+        self.item_tasks = {}
+        
+        # Selected task IDs survive recycling; selected is the focused task,
+        # at selected_index in rows when it was last seen there
+        self.selected = None
+        self.selected_index = None
+        self.selected_ids = set()
+        self.extending = False
+        self.rendered_selection = ()
+        
+        # The scrollbar drives our window instead of the tree's own view
+        self.scrollbar.configure(command=self.yview)
+        self.tree.configure(yscrollcommand=lambda first, last: None)
+        
+        self.tree.bind("<<TreeviewSelect>>", self.on_select)
+        self.tree.bind("<Button-1>", lambda event: self.set_extending(False), add="+")
+        self.tree.bind("<Control-Button-1>", lambda event: self.set_extending(True), add="+")
+        self.tree.bind("<Shift-Button-1>", lambda event: self.set_extending(True), add="+")
+        self.tree.bind("<Configure>", lambda event: self.render())
+        self.tree.bind("<MouseWheel>", self.on_mousewheel)
+        self.tree.bind("<Button-4>", lambda event: self.scroll(-3))
+        self.tree.bind("<Button-5>", lambda event: self.scroll(3))
+        self.tree.bind("<Up>", lambda event: self.move_selection(-1))
+        self.tree.bind("<Down>", lambda event: self.move_selection(1))
+        self.tree.bind("<Prior>", lambda event: self.move_selection(-self.visible_count()))
+        self.tree.bind("<Next>", lambda event: self.move_selection(self.visible_count()))
+        
+    def set_rows(self, rows, keep_position=True):
+        """Show a new task sequence; rows only needs len() and slicing"""
+        self.rows = rows
+        if not keep_position:
+            self.first = 0
+        self.render()
+        
+    def visible_count(self):
+        """Number of rows that fit in the tree's current height"""
+        height = self.tree.winfo_height() - self.header_height
+        return max(1, height // self.row_height)
+    
+    def render(self):
+        """Bind the pooled items to the tasks inside the current window"""
+        total = len(self.rows)
+        visible = self.visible_count()
+        self.first = max(0, min(self.first, total - visible))
+        window = self.rows[self.first:self.first + visible + self.overscan]
+        
+        # Grow or shrink the pool to the window size
+        while len(self.pool) < len(window):
+            self.pool.append(self.tree.insert("", tk.END))
+        while len(self.pool) > len(window):
+            self.tree.delete(self.pool.pop())
+            
+        self.item_tasks = {}
+        selected_items = []
+        for item_id, task in zip(self.pool, window):
+            self.render_row(item_id, task)
+            self.item_tasks[item_id] = task
+            if task["id"] in self.selected_ids:
+                selected_items.append(item_id)
+                
+        # Keep the selection on the tasks, not on the recycled items
+        self.rendered_selection = tuple(selected_items)
+        if selected_items:
+            if self.tree.selection() != self.rendered_selection:
+                self.tree.selection_set(selected_items)
+        elif self.tree.selection():
+            self.tree.selection_remove(*self.tree.selection())
+        self.tree.yview_moveto(0)
+        
+        # Measure real row geometry once rows exist
+        if self.pool:
+            bbox = self.tree.bbox(self.pool[0])
+            if bbox:
+                self.header_height, self.row_height = bbox[1], max(1, bbox[3])
+                
+        if total:
+            self.scrollbar.set(self.first / total, min(1.0, (self.first + visible) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+            
+    def scroll(self, delta):
+        """Scroll the window by a number of rows"""
+        self.first += delta
+        self.render()
+        return "break"
+    
+    def yview(self, *args):
+        """Scrollbar callback: 'moveto fraction' or 'scroll n units|pages'"""
+        if args[0] == "moveto":
+            self.first = int(float(args[1]) * len(self.rows))
+            self.render()
+        elif args[0] == "scroll":
+            count = int(args[1])
+            if args[2] == "pages":
+                count *= self.visible_count()
+            self.scroll(count)
+            
+    def on_mousewheel(self, event):
+        """Scroll on Windows/macOS wheel events"""
+        return self.scroll(-3 if event.delta > 0 else 3)
+    
+    def set_extending(self, extending):
+        """Note whether the next click adds to the selection or replaces it"""
+        self.extending = extending
+        
+    def on_select(self, event):
+        """Remember which tasks are selected so recycling can't lose them"""
+        # Selection changes made by render() itself carry no new information
+        if self.tree.selection() == self.rendered_selection:
+            return
+        items = [item for item in self.tree.selection() if item in self.item_tasks]
+        selection = [self.item_tasks[item] for item in items]
+        if self.extending:
+            # Selected tasks scrolled out of the window stay selected
+            self.selected_ids.difference_update(task["id"] for task in self.item_tasks.values())
+        else:
+            self.selected_ids.clear()
+        self.selected_ids.update(task["id"] for task in selection)
+        
+        focus = self.item_tasks.get(self.tree.focus())
+        if focus is not None and focus["id"] in self.selected_ids:
+            self.selected = focus
+            self.selected_index = self.first + self.pool.index(self.tree.focus())
+        elif selection:
+            self.selected = selection[0]
+            self.selected_index = self.first + self.pool.index(items[0])
+        elif not self.selected_ids:
+            self.selected = None
+            self.selected_index = None
+            
+    def select_all(self):
+        """Select every task in the sequence"""
+        self.selected_ids = {task["id"] for task in self.rows}
+        self.render()
+        return "break"
+            
+    def move_selection(self, delta):
+        """Move the selection with the keyboard, scrolling the window as needed"""
+        if not len(self.rows):
+            return "break"
+        index = self.index_of_selected()
+        index = 0 if index is None else max(0, min(len(self.rows) - 1, index + delta))
+        self.selected = self.rows[index]
+        self.selected_index = index
+        self.selected_ids = {self.selected["id"]}
+        visible = self.visible_count()
+        if index < self.first:
+            self.first = index
+        elif index >= self.first + visible:
+            self.first = index - visible + 1
+        self.render()
+        return "break"
+    
+    def index_of_selected(self):
+        """Position of the selected task in the sequence, or None
+
+        The position remembered on selection holds however far the window
+        has scrolled; once the rows change it is looked for in the window.
+        """
+        if self.selected is None:
+            return None
+        index = self.selected_index
+        if index is not None and index < len(self.rows) and self.rows[index]["id"] == self.selected["id"]:
+            return index
+        for offset, task in enumerate(self.rows[self.first:self.first + len(self.pool)]):
+            if task["id"] == self.selected["id"]:
+                return self.first + offset
+        return None
+    
+    def remove_tasks(self, tasks):
+        """Drop tasks from the sequence and render once
+
+        Tasks inside the window are found by their on-screen position; only
+        a batch reaching outside it needs a pass over the whole sequence.
+        """
+        task_ids = {task["id"] for task in tasks}
+        start = self.first
+        window = self.rows[start:start + len(self.pool)]
+        positions = [start + offset for offset, row in enumerate(window) if row["id"] in task_ids]
+        if len(positions) == len(task_ids):
+            for position in reversed(positions):
+                del self.rows[position]
+            # The selected task moves up by the rows removed above it
+            if self.selected_index is not None:
+                self.selected_index -= bisect.bisect_left(positions, self.selected_index)
+        else:
+            self.rows = [row for row in self.rows if row["id"] not in task_ids]
+        self.selected_ids.difference_update(task_ids)
+        if self.selected is not None and self.selected["id"] in task_ids:
+            self.selected = None
+            self.selected_index = None
+        self.render()
+        
+    def clear(self):
+        """Drop all rows and pooled items"""
+        self.selected = None
+        self.selected_index = None
+        self.selected_ids.clear()
+        self.set_rows([], keep_position=False)
+
 
 class ProfessionalToDoApp:
-    def __init__(self, root):
+    def __init__(self, root, virtual=None, storage="json", profiler=None, serve_port=None):
         self.root = root
         self.root.title("TaskMaster Pro")
         self.root.geometry("800x700")
         self.root.minsize(650, 600)
         
         # Set the file path for saving/loading tasks
-        self.tasks_file = "taskmaster_tasks.json"
+        self.tasks_file = TASKS_FILE
+        
+        # Write-behind state: the scheduled flush and when changes started piling up
+        self.save_job = None
+        self.dirty_since = None
+        
+        # Repaint waiting for the next idle moment: dirty regions, and tasks whose rows changed
+        self.refresh_job = None
+        self.dirty = set()
+        self.dirty_rows = {}
+        
+        # The status message shown next, and the scheduled hiding of the current one
+        self.toast_message = None
+        self.toast_job = None
+        
+        # The one timer waiting for the next repeat or reminder, and the last day
+        # reminded of (None until the first run after loading)
+        self.timer_job = None
+        self.reminded_through = None
         
         # Custom color scheme
         self.colors = {
@@ -37,14 +333,51 @@ class ProfessionalToDoApp:
         self.subtitle_font = Font(family="Helvetica", size=14)
         self.button_font = Font(family="Helvetica", size=11, weight="bold")
         self.text_font = Font(family="Helvetica", size=12)
+        self.small_font = Font(family="Helvetica", size=10)
         
         # Initialize task categories and priorities
-        self.categories = ["Work", "Personal", "Shopping", "Health", "Other"]
-        self.priorities = ["High", "Medium", "Low"]
+        self.categories = list(CATEGORIES)
+        self.priorities = list(PRIORITIES)
+        
+        # Initialize tasks; all task logic lives in the headless store
+        self.store = TaskStore(open_storage(storage, self.tasks_file))
+        self.filter_type = "all"
+        
+        # Changes that Undo and Redo can step back through
+        self.history = UndoHistory()
+        
+        # Title search text, applied together with the status filter
+        self.search_text = ""
+        self.search_job = None
+        
+        # Column the list is sorted by (None keeps the filter's own order)
+        self.sort_key = None
+        self.sort_descending = False
+        
+        # None picks the list mode from the number of loaded tasks
+        self.virtual = virtual
+        self.virtual_list = None
         
-        # Initialize tasks
-        self.tasks = []
+        # Selected rows that the current filter hides, restored when shown again
+        self.hidden_selection = set()
         
+        # Set while tasks are still streaming in from the loader thread, and
+        # for good once loading has failed, keeping the window read-only
+        self.loading = False
+        
+        # Results of a worker thread parsing another window's save, while one runs
+        self.external_reads = None
+        self.external_error = None
+        
+        # Local API server and the change events it streams, when serving
+        self.api_server = None
+        self.change_feed = None
+        
+        # Opt-in timings; methods are wrapped before any widget holds them
+        self.profiler = profiler
+        if profiler is not None:
+            profiler.wrap(self, PROFILED_METHODS)
+            
         # Create UI
         self.create_header()
         self.create_sidebar()
@@ -56,9 +389,27 @@ class ProfessionalToDoApp:
         for child in self.root.winfo_children():
             child.pack_configure(padx=10, pady=5)
             
+        # Placed over the window only while tasks load, or a message is shown
+        self.create_loading_indicator()
+        self.create_toast()
+            
+        # Query-backed storage never holds every task, so it always virtualizes
+        if self.virtual or self.store.queryable:
+            self.enable_virtual_list()
+            
         # Load tasks from file
         self.load_tasks_from_file()
         
+        # Pick up what other windows save to the same tasks
+        self.root.after(EXTERNAL_POLL_INTERVAL, self.poll_external_changes)
+        
+        if serve_port is not None:
+            self.start_api_server(serve_port)
+            
+        if profiler is not None:
+            profiler.watch_event_loop(self.root)
+            self.root.after(PROFILE_PANEL_INTERVAL, self.update_profile_panel)
+        
         # Bind the window close event to save tasks
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
             
@@ -127,6 +478,48 @@ class ProfessionalToDoApp:
         )
         self.completed_tasks_label.pack(pady=5, anchor="w", padx=10)
         
+        self.overdue_tasks_label = tk.Label(
+            self.sidebar, 
+            text="Overdue: 0", 
+            font=self.text_font, 
+            bg=self.colors["card"], 
+            fg=self.colors["danger"]
+        )
+        self.overdue_tasks_label.pack(pady=5, anchor="w", padx=10)
+        
+        # Nearest upcoming deadline, straight from the deadline index
+        self.next_due_label = tk.Label(
+            self.sidebar, 
+            text="Next due: none", 
+            font=self.small_font, 
+            bg=self.colors["card"], 
+            fg=self.colors["text_secondary"],
+            justify=tk.LEFT,
+            wraplength=180
+        )
+        self.next_due_label.pack(pady=(0, 5), anchor="w", padx=10)
+        
+        # Per-category and per-priority breakdowns
+        self.category_stats_label = tk.Label(
+            self.sidebar, 
+            text="", 
+            font=self.small_font, 
+            bg=self.colors["card"], 
+            fg=self.colors["text_secondary"],
+            justify=tk.LEFT
+        )
+        self.category_stats_label.pack(pady=(5, 0), anchor="w", padx=10)
+        
+        self.priority_stats_label = tk.Label(
+            self.sidebar, 
+            text="", 
+            font=self.small_font, 
+            bg=self.colors["card"], 
+            fg=self.colors["text_secondary"],
+            justify=tk.LEFT
+        )
+        self.priority_stats_label.pack(pady=(5, 0), anchor="w", padx=10)
+        
         # Filter section
         filter_label = tk.Label(
             self.sidebar, 
@@ -137,6 +530,19 @@ class ProfessionalToDoApp:
         )
         filter_label.pack(pady=(20, 10), anchor="w", padx=10)
         
+        # Search box, combined with the status filters below
+        self.search_var = tk.StringVar()
+        self.search_var.trace_add("write", self.on_search_changed)
+        search_entry = tk.Entry(
+            self.sidebar, 
+            textvariable=self.search_var, 
+            width=17, 
+            font=self.text_font, 
+            relief=tk.SOLID, 
+            bd=1
+        )
+        search_entry.pack(pady=5, padx=10)
+        
         # Filter buttons
         filter_all = tk.Button(
             self.sidebar, 
@@ -174,6 +580,52 @@ class ProfessionalToDoApp:
         )
         filter_completed.pack(pady=5)
         
+        filter_overdue = tk.Button(
+            self.sidebar, 
+            text="Overdue", 
+            bg=self.colors["card"], 
+            fg=self.colors["danger"], 
+            font=self.button_font, 
+            relief=tk.FLAT, 
+            command=lambda: self.filter_tasks("overdue"),
+            width=15
+        )
+        filter_overdue.pack(pady=5)
+        
+        filter_week = tk.Button(
+            self.sidebar, 
+            text="Due This Week", 
+            bg=self.colors["card"], 
+            fg=self.colors["text"], 
+            font=self.button_font, 
+            relief=tk.FLAT, 
+            command=lambda: self.filter_tasks("week"),
+            width=15
+        )
+        filter_week.pack(pady=5)
+        
+        # Rolling timings, only when profiling is on
+        if self.profiler is not None:
+            profile_label = tk.Label(
+                self.sidebar, 
+                text="Performance", 
+                font=self.button_font, 
+                bg=self.colors["card"], 
+                fg=self.colors["primary"]
+            )
+            profile_label.pack(pady=(20, 5), anchor="w", padx=10)
+            
+            self.profile_stats_label = tk.Label(
+                self.sidebar, 
+                text="", 
+                font=self.small_font, 
+                bg=self.colors["card"], 
+                fg=self.colors["text_secondary"],
+                justify=tk.LEFT,
+                wraplength=180
+            )
+            self.profile_stats_label.pack(anchor="w", padx=10)
+        
         # Content container (main area)
         self.content_container = tk.Frame(main_container, bg=self.colors["background"])
         self.content_container.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True, padx=10, pady=10)
@@ -193,6 +645,18 @@ class ProfessionalToDoApp:
         )
         input_title.grid(row=0, column=0, columnspan=3, sticky="w", padx=15, pady=(15, 5))
         
+        # Bulk add: paste or import many tasks at once
+        self.bulk_add_button = tk.Button(
+            input_frame, 
+            text="Bulk Add...", 
+            command=self.open_bulk_add, 
+            bg=self.colors["card"], 
+            fg=self.colors["secondary"], 
+            font=self.button_font, 
+            relief=tk.FLAT
+        )
+        self.bulk_add_button.grid(row=0, column=2, padx=15, pady=(15, 5), sticky="e")
+        
         # Task name input
         task_label = tk.Label(
             input_frame, 
@@ -271,11 +735,34 @@ class ProfessionalToDoApp:
             width=15, 
             font=self.text_font
         )
-        self.due_date_entry.insert(0, "MM/DD/YYYY")
+        self.due_date_entry.insert(0, DUE_PLACEHOLDER)
         self.due_date_entry.grid(row=3, column=1, sticky="w", padx=5, pady=5)
         
+        # Repeat rule dropdown
+        repeat_label = tk.Label(
+            input_frame, 
+            text="Repeat:", 
+            font=self.text_font, 
+            bg=self.colors["card"], 
+            fg=self.colors["text"]
+        )
+        repeat_label.grid(row=3, column=1, sticky="e", padx=(150, 5), pady=5)
+        
+        self.repeat_choices = ["Never"] + [rule.capitalize() for rule in REPEAT_RULES]
+        self.repeat_var = tk.StringVar()
+        self.repeat_var.set(self.repeat_choices[0])
+        repeat_dropdown = ttk.Combobox(
+            input_frame, 
+            textvariable=self.repeat_var, 
+            values=self.repeat_choices, 
+            state="readonly", 
+            font=self.text_font, 
+            width=10
+        )
+        repeat_dropdown.grid(row=3, column=2, sticky="w", padx=5, pady=5)
+        
         # Add button
-        add_button = tk.Button(
+        self.add_button = tk.Button(
             input_frame, 
             text="Add Task", 
             command=self.add_task, 
@@ -286,7 +773,7 @@ class ProfessionalToDoApp:
             pady=5, 
             relief=tk.FLAT
         )
-        add_button.grid(row=3, column=2, padx=15, pady=15, sticky="e")
+        self.add_button.grid(row=4, column=2, padx=15, pady=(5, 15), sticky="e")
         
         # Configure grid to expand properly
         input_frame.grid_columnconfigure(1, weight=1)
@@ -308,14 +795,18 @@ class ProfessionalToDoApp:
         
         # Create columns for task list
         columns = ("task", "category", "priority", "due_date", "status")
-        self.task_tree = ttk.Treeview(list_frame, columns=columns, show="headings", selectmode="browse")
+        self.task_tree = ttk.Treeview(list_frame, columns=columns, show="headings", selectmode="extended")
         
-        # Configure column headings
-        self.task_tree.heading("task", text="Task")
-        self.task_tree.heading("category", text="Category")
-        self.task_tree.heading("priority", text="Priority")
-        self.task_tree.heading("due_date", text="Due Date")
-        self.task_tree.heading("status", text="Status")
+        # Configure column headings; clicking one sorts by that column
+        self.column_titles = {
+            "task": "Task",
+            "category": "Category",
+            "priority": "Priority",
+            "due_date": "Due Date",
+            "status": "Status"
+        }
+        for column, title in self.column_titles.items():
+            self.task_tree.heading(column, text=title, command=lambda column=column: self.sort_tasks(column))
         
         # Configure column widths
         self.task_tree.column("task", width=250, minwidth=200)
@@ -324,16 +815,24 @@ class ProfessionalToDoApp:
         self.task_tree.column("due_date", width=100, minwidth=80)
         self.task_tree.column("status", width=80, minwidth=80)
         
+        # Row colors come from a fixed set of tags shared by all rows
+        for tag, style in ROW_STYLES.items():
+            self.task_tree.tag_configure(tag, **style)
+        
         # Create scrollbar
-        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.task_tree.yview)
-        self.task_tree.configure(yscroll=scrollbar.set)
+        self.task_scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.task_tree.yview)
+        self.task_tree.configure(yscroll=self.task_scrollbar.set)
         
         # Pack tree and scrollbar
         self.task_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=15, pady=10)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y, padx=(0, 15), pady=10)
+        self.task_scrollbar.pack(side=tk.RIGHT, fill=tk.Y, padx=(0, 15), pady=10)
         
-        # Bind double click to mark task as done
+        # Bind double click and the space bar to mark task as done
         self.task_tree.bind("<Double-1>", self.toggle_task_status)
+        self.task_tree.bind("<space>", self.toggle_task_status)
+        
+        # Ctrl+A selects every shown task for mass complete or remove
+        self.task_tree.bind("<Control-a>", self.select_all_tasks)
         
     def create_footer(self):
         """Create footer with action buttons"""
@@ -380,6 +879,39 @@ class ProfessionalToDoApp:
         )
         self.clear_button.pack(side=tk.LEFT, padx=5)
         
+        self.undo_button = tk.Button(
+            footer_frame, 
+            text="Undo", 
+            command=self.undo, 
+            bg=self.colors["secondary"], 
+            fg="white", 
+            font=self.button_font, 
+            padx=15, 
+            pady=8, 
+            relief=tk.FLAT, 
+            state=tk.DISABLED
+        )
+        self.undo_button.pack(side=tk.LEFT, padx=5)
+        
+        self.redo_button = tk.Button(
+            footer_frame, 
+            text="Redo", 
+            command=self.redo, 
+            bg=self.colors["secondary"], 
+            fg="white", 
+            font=self.button_font, 
+            padx=15, 
+            pady=8, 
+            relief=tk.FLAT, 
+            state=tk.DISABLED
+        )
+        self.redo_button.pack(side=tk.LEFT, padx=5)
+        
+        # Ctrl+Z undoes; Ctrl+Y or Ctrl+Shift+Z redoes
+        self.root.bind("<Control-z>", self.undo)
+        self.root.bind("<Control-y>", self.redo)
+        self.root.bind("<Control-Z>", self.redo)
+        
         # Add Save button
         self.save_button = tk.Button(
             footer_frame, 
@@ -394,267 +926,898 @@ class ProfessionalToDoApp:
         )
         self.save_button.pack(side=tk.RIGHT, padx=5)
         
+    def create_loading_indicator(self):
+        """Create the loading progress message shown in the status area"""
+        self.loading_frame = tk.Frame(self.root, bg=self.colors["secondary"], padx=10, pady=5)
+        
+        self.loading_label = tk.Label(
+            self.loading_frame, 
+            text="Loading tasks...", 
+            bg=self.colors["secondary"],
+            fg="white",
+            font=self.button_font
+        )
+        self.loading_label.pack(side=tk.TOP)
+        
+        self.loading_bar = ttk.Progressbar(self.loading_frame, mode="indeterminate", length=200)
+        self.loading_bar.pack(side=tk.TOP, pady=(5, 0))
+        
+    def create_toast(self):
+        """Create the one label every brief status message is shown in"""
+        self.toast = tk.Label(
+            self.root, 
+            bg=self.colors["accent"], 
+            fg="white", 
+            font=self.button_font, 
+            padx=10, 
+            pady=5
+        )
+        
     def add_task(self):
         """Adds a new task to the list with category, priority and due date"""
         task = self.task_entry.get().strip()
         category = self.category_var.get()
         priority = self.priority_var.get()
         due_date = self.due_date_entry.get()
+        repeat = None if self.repeat_var.get() == self.repeat_choices[0] else self.repeat_var.get().lower()
         
         # Validate inputs
         if not task:
             messagebox.showwarning("Warning", "Task cannot be empty!")
             return
             
-        # Create task item
-        task_id = len(self.tasks)
-        task_item = {
-            "id": task_id,
-            "task": task,
-            "category": category,
-            "priority": priority,
-            "due_date": due_date,
-            "status": "Pending"
-        }
-        
-        # Add to tasks list
-        self.tasks.append(task_item)
+        # Add to tasks list; the due date is parsed and checked on the way in
+        try:
+            task_item = self.store.add(task, category, priority, due_date, repeat=repeat)
+        except ValueError as e:
+            messagebox.showwarning("Warning", f"{str(e)}!")
+            return
+        except sqlite3.Error as e:
+            messagebox.showerror("Error", f"Failed to add task: {str(e)}")
+            return
         
         # Add to treeview
-        item_id = self.task_tree.insert("", tk.END, values=(
-            task, category, priority, due_date, "Pending"
-        ))
-        
-        # Set row color based on priority
-        if priority == "High":
-            self.task_tree.tag_configure(f"priority_{task_id}", background="#FFEBEE")
-            self.task_tree.item(item_id, tags=(f"priority_{task_id}",))
-        elif priority == "Medium":
-            self.task_tree.tag_configure(f"priority_{task_id}", background="#FFF8E1")
-            self.task_tree.item(item_id, tags=(f"priority_{task_id}",))
+        self.show_new_tasks([task_item])
+        self.remember("add", [task_item])
+        self.publish("added", [task_item])
         
         # Clear entry fields
         self.task_entry.delete(0, tk.END)
         self.due_date_entry.delete(0, tk.END)
-        self.due_date_entry.insert(0, "MM/DD/YYYY")
+        self.due_date_entry.insert(0, DUE_PLACEHOLDER)
+        self.repeat_var.set(self.repeat_choices[0])
         
-        # Update stats
-        self.update_stats()
+        # Update stats with the next repaint
+        self.schedule_refresh("stats", "timers")
         
-        # Save tasks to file
-        self.save_tasks_to_file()
+        # Save tasks to file once the burst of changes settles
+        self.schedule_save()
         
-    def remove_task(self):
-        """Removes the selected task"""
+    def open_bulk_add(self):
+        """Open a dialog to paste or import many tasks at once"""
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Bulk Add Tasks")
+        dialog.transient(self.root)
+        dialog.configure(bg=self.colors["card"])
+        
+        hint_label = tk.Label(
+            dialog, 
+            text="One task per line, optionally: task, category, priority, due date\n"
+                 "or CSV with a header row. Missing fields use the form's choices.", 
+            font=self.small_font, 
+            bg=self.colors["card"], 
+            fg=self.colors["text_secondary"],
+            justify=tk.LEFT
+        )
+        hint_label.pack(anchor="w", padx=15, pady=(15, 5))
+        
+        text = tk.Text(dialog, width=60, height=15, font=self.text_font, relief=tk.SOLID, bd=1)
+        text.pack(fill=tk.BOTH, expand=True, padx=15, pady=5)
+        text.focus_set()
+        
+        def add_pasted():
+            records = clean_records(parse_task_lines(text.get("1.0", tk.END).splitlines()))
+            if not records:
+                messagebox.showwarning("Warning", "There are no tasks to add!", parent=dialog)
+            elif self.add_tasks(records):
+                dialog.destroy()
+                
+        def import_file():
+            path = filedialog.askopenfilename(
+                parent=dialog, 
+                title="Import Tasks", 
+                filetypes=[("Task files", "*.csv *.txt *.json"), ("All files", "*.*")]
+            )
+            if not path:
+                return
+            try:
+                records = read_task_records(path)
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to read {path}: {str(e)}", parent=dialog)
+                return
+            if self.add_tasks(records):
+                dialog.destroy()
+                
+        button_frame = tk.Frame(dialog, bg=self.colors["card"])
+        button_frame.pack(fill=tk.X, padx=15, pady=(5, 15))
+        
+        add_button = tk.Button(
+            button_frame, 
+            text="Add Tasks", 
+            command=add_pasted, 
+            bg=self.colors["accent"], 
+            fg="white", 
+            font=self.button_font, 
+            padx=15, 
+            pady=5, 
+            relief=tk.FLAT
+        )
+        add_button.pack(side=tk.RIGHT, padx=5)
+        
+        import_button = tk.Button(
+            button_frame, 
+            text="Import File...", 
+            command=import_file, 
+            bg=self.colors["secondary"], 
+            fg="white", 
+            font=self.button_font, 
+            padx=15, 
+            pady=5, 
+            relief=tk.FLAT
+        )
+        import_button.pack(side=tk.LEFT, padx=5)
+        
+    def add_tasks(self, records):
+        """Add a batch of task records with one list update, one stats refresh and one save
+
+        Nothing is added if any record is invalid. Returns whether the batch
+        was added.
+        """
+        defaults = {"category": self.category_var.get(), "priority": self.priority_var.get()}
         try:
-            selected_item = self.task_tree.selection()[0]
-            # Get index of the task
-            item_values = self.task_tree.item(selected_item, "values")
-            task_name = item_values[0]
-            
-            # Remove from tasks list
-            for i, task in enumerate(self.tasks):
-                if task["task"] == task_name:
-                    self.tasks.pop(i)
-                    break
-            
-            # Remove from treeview
-            self.task_tree.delete(selected_item)
-            
-            # Update stats
-            self.update_stats()
-   
-            # Save tasks to file
-            self.save_tasks_to_file()
-        except IndexError:
+            tasks = self.store.add_many([{**defaults, **record} for record in records])
+        except (ValueError, sqlite3.Error) as e:
+            messagebox.showerror("Error", f"No tasks were added: {str(e)}")
+            return False
+        
+        self.show_new_tasks(tasks)
+        self.remember("add", tasks)
+        self.publish("added", tasks)
+        self.schedule_refresh("stats", "timers")
+        self.schedule_save()
+        return True
+        
+    def remove_task(self):
+        """Removes the selected tasks"""
+        tasks = self.selected_tasks()
+        if not tasks:
             messagebox.showwarning("Warning", "Please select a task to remove!")
+            return
+        self.delete_tasks(tasks)
+        self.remember("remove", tasks)
+        
+    def delete_tasks(self, tasks):
+        """Remove tasks from the store and the list in one update"""
+        # Rows are found before their links are dropped with the tasks
+        items = [] if self.virtual_list else [self.store.index.item_for_task(task["id"]) for task in tasks]
+        
+        # Remove from tasks list
+        self.store.remove_many([task["id"] for task in tasks])
+        self.publish("removed", tasks)
+        
+        # Remove from treeview in one update
+        if self.store.queryable:
+            self.virtual_list.selected = None
+            self.virtual_list.selected_ids.clear()
+            self.refresh_virtual_list()
+        elif self.virtual_list:
+            self.virtual_list.remove_tasks(tasks)
+        else:
+            self.task_tree.delete(*items)
+            self.hidden_selection.difference_update(items)
+        
+        # Update stats with the next repaint
+        self.schedule_refresh("stats")
+        
+        # Save tasks to file once the burst of changes settles
+        self.schedule_save()
         
     def mark_as_done(self):
-        """Marks a selected task as completed or pending"""
-        try:
-            selected_item = self.task_tree.selection()[0]
-            item_values = self.task_tree.item(selected_item, "values")
-            
-            # Get current status and toggle it
-            current_status = item_values[4]
-            new_status = "Completed" if current_status == "Pending" else "Pending"
-            
-            # Update treeview
-            self.task_tree.item(selected_item, values=(
-                item_values[0], item_values[1], item_values[2], item_values[3], new_status
-            ))
-            
-            # Update task list
-            task_name = item_values[0]
-            for task in self.tasks:
-                if task["task"] == task_name:
-                    task["status"] = new_status
-                    break
-                    
-            # Update row color
-            if new_status == "Completed":
-                self.task_tree.tag_configure(f"completed_{task_name}", background=self.colors["completed"])
-                self.task_tree.item(selected_item, tags=(f"completed_{task_name}",))
-            else:
-                # Remove completed tag
-                self.task_tree.item(selected_item, tags=())
-                
-                # Re-apply priority tag if needed
-                for task in self.tasks:
-                    if task["task"] == task_name:
-                        if task["priority"] == "High":
-                            self.task_tree.tag_configure(f"priority_{task['id']}", background="#FFEBEE")
-                            self.task_tree.item(selected_item, tags=(f"priority_{task['id']}",))
-                        elif task["priority"] == "Medium":
-                            self.task_tree.tag_configure(f"priority_{task['id']}", background="#FFF8E1")
-                            self.task_tree.item(selected_item, tags=(f"priority_{task['id']}",))
-                        break
-            
-            # Update stats
-            self.update_stats()
- 
-            # Save tasks to file
-            self.save_tasks_to_file()
-        except IndexError:
+        """Marks the selected tasks as completed, or as pending if all are completed"""
+        tasks = self.selected_tasks()
+        if not tasks:
             messagebox.showwarning("Warning", "Please select a task to mark as done!")
+            return
+        
+        # Toggle the current status; a mixed selection is completed
+        status = "Pending" if all(task["status"] == "Completed" for task in tasks) else "Completed"
+        previous = [task["status"] for task in tasks]
+        self.change_status([task["id"] for task in tasks], status)
+        self.remember("status", tasks, status, previous)
+        
+    def change_status(self, task_ids, status):
+        """Give tasks a new status; their rows and the stats are redrawn with the next repaint"""
+        tasks = self.store.set_status_many(task_ids, status)
+        self.publish("updated", tasks)
+        self.schedule_refresh("rows", "stats", "timers", tasks=tasks)
+        
+        # Save tasks to file once the burst of changes settles
+        self.schedule_save()
     
     def toggle_task_status(self, event):
-        """Toggle task status on double click"""
-        self.mark_as_done()
+        """Toggle task status on double click or the space bar"""
+        if not self.loading:
+            self.mark_as_done()
+        return "break"
+        
+    def selected_tasks(self):
+        """Tasks of the selected rows, in list order for the full list"""
+        if self.virtual_list:
+            return self.store.get_many(sorted(self.virtual_list.selected_ids))
+        tasks = (self.store.index.task_for_item(item_id) for item_id in self.task_tree.selection())
+        return [task for task in tasks if task is not None]
+    
+    def select_all_tasks(self, event=None):
+        """Select every task the current filter shows"""
+        if self.virtual_list:
+            return self.virtual_list.select_all()
+        self.task_tree.selection_set(self.task_tree.get_children())
+        return "break"
         
     def clear_all(self):
         """Clears all tasks from the list"""
         confirm = messagebox.askyesno("Confirm", "Are you sure you want to clear all tasks?")
         if confirm:
-            # Clear treeview
-            for item in self.task_tree.get_children():
-                self.task_tree.delete(item)
+            # The cleared tasks are kept so Undo can bring them back
+            tasks = list(self.store)
+            self.clear_tasks()
+            self.remember("clear", tasks)
             
-            # Clear tasks list
-            self.tasks.clear()
+    def clear_tasks(self):
+        """Delete every task and every row"""
+        # Clear treeview
+        if self.virtual_list:
+            self.virtual_list.clear()
+        else:
+            self.clear_task_rows()
+        
+        # Clear tasks list
+        self.store.clear()
+        self.publish("cleared")
+        
+        # Update stats with the next repaint
+        self.schedule_refresh("stats")
+        # Save tasks to file (which will be empty)
+        self.schedule_save()
+        
+    def restore_tasks(self, tasks):
+        """Put removed tasks back in their old places with one list update"""
+        tasks = self.store.restore(tasks)
+        self.publish("added", tasks)
+        if self.virtual is None and not self.virtual_list and len(self.store) >= VIRTUAL_LIST_THRESHOLD:
+            self.enable_virtual_list()
+        elif not self.virtual_list:
+            for task in tasks:
+                self.insert_task_row(task)
+                
+        # Refiltering orders every row in a single set_children call or render
+        self.filter_tasks(self.filter_type)
+        self.schedule_refresh("stats", "timers")
+        self.schedule_save()
+        
+    def remember(self, kind, tasks, status=None, previous=None):
+        """Record a change for Undo"""
+        self.history.record(kind, tasks, status, previous)
+        self.update_history_buttons()
+        
+    def undo(self, event=None):
+        """Undo the last change to the tasks"""
+        if not self.loading:
+            step = self.history.undo()
+            if step is not None:
+                self.apply_step(step, undo=True)
+        return "break"
+    
+    def redo(self, event=None):
+        """Redo the last change that was undone"""
+        if not self.loading:
+            step = self.history.redo()
+            if step is not None:
+                self.apply_step(step, undo=False)
+        return "break"
+    
+    def apply_step(self, step, undo):
+        """Apply a history step's inverse to undo it, or the step itself to redo it
+
+        Tasks another window has removed in the meantime are skipped.
+        """
+        if step.kind == "clear" and not undo:
+            self.clear_tasks()
+        elif step.kind == "status" or (step.kind == "add") == undo:
+            tasks = [task for task in step.tasks if self.store.get(task["id"]) is not None]
+            if step.kind != "status":
+                self.delete_tasks(tasks)
+            elif undo:
+                present = {task["id"] for task in tasks}
+                for status in set(step.previous):
+                    self.change_status([task["id"] for task, previous in zip(step.tasks, step.previous)
+                                        if previous == status and task["id"] in present], status)
+            else:
+                self.change_status([task["id"] for task in tasks], step.status)
+        else:
+            self.restore_tasks(step.tasks)
+        self.update_history_buttons()
+        
+    def update_history_buttons(self):
+        """Enable Undo and Redo only when there is something to step through"""
+        self.undo_button.config(state=tk.NORMAL if self.history.can_undo and not self.loading else tk.DISABLED)
+        self.redo_button.config(state=tk.NORMAL if self.history.can_redo and not self.loading else tk.DISABLED)
+    
+    def matches_filter(self, task):
+        """Check a task against the active status filter and search"""
+        return self.store.matches(task, self.filter_type, self.search_text)
+    
+    def filtered_tasks(self):
+        """Tasks passing the status filter and search, in list order"""
+        return self.store.query(self.filter_type, self.search_text,
+                                order_by=self.sort_key, descending=self.sort_descending)
+    
+    def sort_tasks(self, column):
+        """Sort the list by a column; clicking the same heading again reverses it
+
+        The store keeps every column ordering up to date, so sorting only
+        reorders rows. Reversing needs no query at all: the shown rows are
+        flipped in place.
+        """
+        reverse = self.sort_key == column
+        self.sort_descending = reverse and not self.sort_descending
+        self.sort_key = column
+        for name, title in self.column_titles.items():
+            arrow = (" \u25bc" if self.sort_descending else " \u25b2") if name == column else ""
+            self.task_tree.heading(name, text=title + arrow)
             
-            # Update stats
-            self.update_stats() 
-            # Save tasks to file (which will be empty)
-            self.save_tasks_to_file()
+        if not reverse or self.store.queryable:
+            self.filter_tasks(self.filter_type)
+        elif self.virtual_list:
+            self.virtual_list.rows.reverse()
+            self.virtual_list.render()
+        else:
+            self.show_task_rows(self.task_tree.get_children()[::-1])
+    
+    def on_search_changed(self, *args):
+        """Re-run the search shortly after the user stops typing"""
+        if self.search_job is not None:
+            self.root.after_cancel(self.search_job)
+        self.search_job = self.root.after(SEARCH_DELAY, self.apply_search)
+        
+    def apply_search(self):
+        """Refilter the list by the search box text"""
+        self.search_job = None
+        self.search_text = self.search_var.get()
+        self.filter_tasks(self.filter_type)
     
     def filter_tasks(self, filter_type):
         """Filter tasks based on status"""
-        # Clear current view
-        for item in self.task_tree.get_children():
-            self.task_tree.delete(item)
-        
-        # Apply filter
-        for task in self.tasks:
-            if filter_type == "all" or \
-               (filter_type == "active" and task["status"] == "Pending") or \
-               (filter_type == "completed" and task["status"] == "Completed"):
-                
-                item_id = self.task_tree.insert("", tk.END, values=(
-                    task["task"], task["category"], task["priority"], 
-                    task["due_date"], task["status"]
-                ))
+        self.filter_type = filter_type
+        
+        if self.virtual_list:
+            self.refresh_virtual_list()
+            return
+        
+        # Every task keeps its row; the filter only decides which are attached
+        self.show_task_rows([self.store.index.item_for_task(task["id"]) for task in self.filtered_tasks()])
+        
+    def show_task_rows(self, items):
+        """Attach exactly these rows, in order, keeping scroll position and selection
+
+        set_children detaches every other row in a single Tcl call, so
+        switching filters never deletes or re-creates rows.
+        """
+        top = self.task_tree.yview()[0]
+        selection = set(self.task_tree.selection()) | self.hidden_selection
+        
+        self.task_tree.set_children("", *items)
+        
+        # Selected rows the filter now hides are remembered for later
+        shown = [item for item in selection if self.matches_filter(self.store.index.task_for_item(item))]
+        self.hidden_selection = selection.difference(shown)
+        self.task_tree.selection_set(shown)
+        self.task_tree.yview_moveto(top)
+        if shown:
+            self.task_tree.see(shown[0])
                 
-                # Apply styling
-                if task["status"] == "Completed":
-                    self.task_tree.tag_configure(f"completed_{task['task']}", background=self.colors["completed"])
-                    self.task_tree.item(item_id, tags=(f"completed_{task['task']}",))
-                elif task["priority"] == "High":
-                    self.task_tree.tag_configure(f"priority_{task['id']}", background="#FFEBEE")
-                    self.task_tree.item(item_id, tags=(f"priority_{task['id']}",))
-                elif task["priority"] == "Medium":
-                    self.task_tree.tag_configure(f"priority_{task['id']}", background="#FFF8E1")
-                    self.task_tree.item(item_id, tags=(f"priority_{task['id']}",))
+    def insert_task_row(self, task):
+        """Add a Treeview row for a task and link it in the index"""
+        item_id = self.task_tree.insert("", tk.END, values=self.task_values(task), tags=(self.row_tag(task),))
+        self.store.index.link(item_id, task["id"])
+        return item_id
+        
+    def clear_task_rows(self):
+        """Delete every Treeview row, including rows the filter has detached"""
+        self.task_tree.delete(*self.store.index.item_tasks)
+        self.store.index.clear_items()
+        self.hidden_selection.clear()
+    
+    def task_values(self, task):
+        """Column values shown for a task row"""
+        due_date = task["due_date"] if task["repeat"] is None else f"{task['due_date']} ({task['repeat']})"
+        return (task["task"], task["category"], task["priority"], due_date, task["status"])
+    
+    def row_tag(self, task):
+        """Name of the shared ROW_STYLES tag for a task"""
+        if task["status"] == "Completed":
+            return "completed"
+        if task["due"] is not None and task["due"] < self.store.counters.today:
+            return "overdue"
+        return task["priority"].lower() if task["priority"] in self.priorities else "low"
+    
+    def render_row(self, item_id, task):
+        """Show a task's values and style in an existing Treeview item"""
+        self.task_tree.item(item_id, values=self.task_values(task), tags=(self.row_tag(task),))
+    
+    def enable_virtual_list(self):
+        """Switch the task list to virtualized mode"""
+        self.clear_task_rows()
+        self.virtual_list = VirtualTaskList(self.task_tree, self.task_scrollbar, self.render_row)
+        
+    def refresh_virtual_list(self, keep_position=True):
+        """Recompute the filtered sequence shown by the virtual list"""
+        self.virtual_list.set_rows(self.filtered_tasks(), keep_position)
     
     def update_stats(self):
-        """Update statistics in sidebar"""
-        total_tasks = len(self.tasks)
-        completed_tasks = sum(1 for task in self.tasks if task["status"] == "Completed")
+        """Update statistics in sidebar from the running counters"""
+        counters = self.store.counters
+        self.total_tasks_label.config(text=f"Total Tasks: {counters.total}")
+        self.completed_tasks_label.config(text=f"Completed: {counters.completed}")
+        self.overdue_tasks_label.config(text=f"Overdue: {counters.overdue_count()}")
+        # The deadline index is sorted once loading is done
+        if not self.loading:
+            next_due = self.store.next_due()
+            self.next_due_label.config(text="Next due: none" if next_due is None else
+                                       f"Next due: {next_due['task']} ({next_due['due_date']})")
+        self.category_stats_label.config(text="\n".join(
+            f"{category}: {counters.categories[category]}" for category in self.categories))
+        self.priority_stats_label.config(text="\n".join(
+            f"{priority} priority: {counters.priorities[priority]}" for priority in self.priorities))
+
+    def schedule_refresh(self, *regions, tasks=()):
+        """Mark parts of the window dirty and repaint them once the event queue is idle
+
+        regions are "rows" (the rows of tasks, or the virtual window),
+        "stats", "toast" and "timers" (the wake-up for the next repeat or
+        reminder). However many changes come in before the repaint,
+        each region is drawn once, so a burst of key presses never queues up
+        redundant redraws.
+        """
+        self.dirty.update(regions)
+        for task in tasks:
+            self.dirty_rows[task["id"]] = task
+        if self.refresh_job is None:
+            self.refresh_job = self.root.after_idle(self.refresh)
+            
+    def refresh(self):
+        """Repaint every dirty region"""
+        self.refresh_job = None
+        dirty, self.dirty = self.dirty, set()
+        tasks, self.dirty_rows = self.dirty_rows, {}
+        
+        if "rows" in dirty:
+            if self.store.queryable:
+                self.refresh_virtual_list()
+            elif self.virtual_list:
+                self.virtual_list.render()
+            else:
+                # Rows deleted since they were marked have no item left
+                for task in tasks.values():
+                    item_id = self.store.index.item_for_task(task["id"])
+                    if item_id is not None:
+                        self.render_row(item_id, task)
+        if "stats" in dirty:
+            self.update_stats()
+        if "toast" in dirty:
+            self.place_toast()
+        if "timers" in dirty:
+            self.schedule_timers()
+            
+    def show_toast(self, text, background, duration=TOAST_DURATION):
+        """Show a brief status message with the next repaint, replacing any already shown"""
+        self.toast_message = (text, background, duration)
+        self.schedule_refresh("toast")
+        
+    def place_toast(self):
+        """Put the latest message in the toast label and restart its timer"""
+        text, background, duration = self.toast_message
+        self.toast.config(text=text, bg=background)
+        self.toast.place(relx=0.5, rely=0.9, anchor="center")
+        self.toast.lift()
+        if self.toast_job is not None:
+            self.root.after_cancel(self.toast_job)
+        self.toast_job = self.root.after(duration, self.hide_toast)
+        
+    def hide_toast(self):
+        self.toast_job = None
+        self.toast.place_forget()
         
-        self.total_tasks_label.config(text=f"Total Tasks: {total_tasks}")
-        self.completed_tasks_label.config(text=f"Completed: {completed_tasks}")
+    def run_timers(self):
+        """Add the occurrences repeating tasks need and show due reminders, then sleep again
 
+        The first run after loading catches up on everything that came due
+        while the app was closed, as one batch of new occurrences and one
+        reminder message.
+        """
+        self.timer_job = None
+        now = datetime.datetime.now()
+        today = now.date().toordinal()
+        try:
+            changes, created = self.store.advance_recurrences(today)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to add repeating tasks: {str(e)}")
+        else:
+            if changes is not None:
+                self.show_external_changes(changes)
+            if created:
+                self.show_new_tasks(created)
+                self.publish("added", created)
+                self.schedule_refresh("stats")
+                
+        # A day's reminders are due from REMINDER_TIME on; the first run also covers overdue tasks
+        reminder_day = today if now.time() >= REMINDER_TIME else today - 1
+        if self.reminded_through is None or reminder_day > self.reminded_through:
+            start = None if self.reminded_through is None else self.reminded_through + 1
+            self.show_reminders(self.store.pending_due(start, reminder_day + 1))
+            self.reminded_through = reminder_day
+        self.schedule_timers()
+        
+    def schedule_timers(self):
+        """Sleep in a single root.after until the next occurrence or reminder is due
+
+        Only the earliest repeating task and the nearest pending due day are
+        looked up, so waiting costs nothing per task. An occurrence that is
+        already due, because adding it failed, waits for the next wake-up.
+        """
+        if self.reminded_through is None:
+            return
+        if self.timer_job is not None:
+            self.root.after_cancel(self.timer_job)
+        now = datetime.datetime.now()
+        deadlines = []
+        repeat_day = self.store.next_repeat_day()
+        if repeat_day is not None and repeat_day > now.date().toordinal():
+            deadlines.append(datetime.datetime.combine(datetime.date.fromordinal(repeat_day), datetime.time()))
+        next_due = self.store.next_due(self.reminded_through + 1)
+        if next_due is not None:
+            deadlines.append(datetime.datetime.combine(datetime.date.fromordinal(next_due["due"]), REMINDER_TIME))
+        delay = MAX_TIMER_DELAY
+        if deadlines:
+            delay = min(delay, max(0, int((min(deadlines) - now).total_seconds() * 1000) + 1))
+        self.timer_job = self.root.after(delay, self.run_timers)
+        
+    def show_reminders(self, tasks):
+        """Show one message for a batch of pending tasks that came due"""
+        count = len(tasks)
+        if not count:
+            return
+        titles = ", ".join(task["task"] for task in tasks[:REMINDER_TITLES])
+        more = f" and {count - REMINDER_TITLES} more" if count > REMINDER_TITLES else ""
+        self.show_toast(f"Due: {titles}{more}", self.colors["primary"], REMINDER_DURATION)
+        self.root.bell()
+        
+    def update_profile_panel(self):
+        """Show the rolling p50/p99 timings in the sidebar, then again shortly"""
+        lines = ["p50 / p99 in ms"]
+        for name, p50, p99, count in self.profiler.stats():
+            lines.append(f"{name}: {p50 * 1000:.1f} / {p99 * 1000:.1f} ({count})")
+        self.profile_stats_label.config(text="\n".join(lines))
+        self.root.after(PROFILE_PANEL_INTERVAL, self.update_profile_panel)
+        
+    def schedule_save(self):
+        """Coalesce changes into one save after a short idle period"""
+        now = time.monotonic()
+        if self.dirty_since is None:
+            self.dirty_since = now
+        if self.save_job is not None:
+            self.root.after_cancel(self.save_job)
+            
+        # Keep pushing the save back while changes arrive, up to SAVE_MAX_DELAY
+        if now - self.dirty_since >= SAVE_MAX_DELAY:
+            self.save_job = self.root.after_idle(self.save_tasks_to_file)
+        else:
+            self.save_job = self.root.after(SAVE_IDLE_DELAY, self.save_tasks_to_file)
+            
+    def flush_pending_save(self):
+        """Write any scheduled save right away"""
+        if self.save_job is not None or self.dirty_since is not None:
+            self.save_tasks_to_file()
+    
     def save_tasks_to_file(self):
-        """Save tasks to a JSON file"""
+        """Save tasks through the storage backend"""
+        if self.save_job is not None:
+            self.root.after_cancel(self.save_job)
+            self.save_job = None
+        self.dirty_since = None
+        
         try:
-            with open(self.tasks_file, 'w') as file:
-                json.dump(self.tasks, file)
+            changes = self.store.save()
+            if changes is not None:
+                self.show_external_changes(changes)
                 
             # Optional: Show a brief status message
-            status_label = tk.Label(
-                self.root, 
-                text="Tasks saved successfully!", 
-                bg=self.colors["accent"],
-                fg="white",
-                font=self.button_font,
-                padx=10,
-                pady=5
-            )
-            status_label.place(relx=0.5, rely=0.9, anchor="center")
-            # Remove the message after 2 seconds
-            self.root.after(2000, status_label.destroy)
+            self.show_toast("Tasks saved successfully!", self.colors["accent"])
                 
         except Exception as e:
             messagebox.showerror("Error", f"Failed to save tasks: {str(e)}")
     
+    def poll_external_changes(self):
+        """Merge in tasks other windows saved, then check again shortly
+
+        Only the file's signature is checked on the Tk thread. After another
+        window has saved, a worker thread parses the file and a later poll
+        applies just the tasks that differ. Polling goes on after a failure,
+        which is reported once until a poll succeeds.
+        """
+        try:
+            if not self.loading:
+                self.merge_external_changes()
+        except Exception as e:
+            if str(e) != self.external_error:
+                self.external_error = str(e)
+                messagebox.showerror("Error", f"Failed to read tasks saved by another window: {str(e)}")
+        delay = EXTERNAL_POLL_INTERVAL if self.external_reads is None else LOAD_POLL_INTERVAL
+        self.root.after(delay, self.poll_external_changes)
+        
+    def merge_external_changes(self):
+        """Start parsing another window's save, or show it once it is parsed"""
+        if self.store.queryable:
+            changes = self.store.sync()
+        elif self.external_reads is None:
+            if self.store.changed_externally():
+                self.external_reads = queue.Queue()
+                threading.Thread(target=self.read_external_in_background, args=(self.external_reads,),
+                                 daemon=True).start()
+            return
+        else:
+            try:
+                kind, payload = self.external_reads.get_nowait()
+            except queue.Empty:
+                return
+            self.external_reads = None
+            if kind == "error":
+                raise payload
+            changes = None if payload is None else self.store.sync(payload)
+        self.external_error = None
+        if changes is not None:
+            self.show_external_changes(changes)
+            
+    def read_external_in_background(self, results):
+        """Worker thread: parse the tasks another window saved for the next poll"""
+        try:
+            results.put(("tasks", self.store.read_external()))
+        except Exception as e:
+            results.put(("error", e))
+        
+    def show_external_changes(self, changes):
+        """Update just the rows of tasks another window added, changed or removed"""
+        added, updated, removed, removed_items = changes
+        if self.change_feed is not None:
+            self.change_feed.publish_changes(changes)
+        if self.store.queryable:
+            self.refresh_virtual_list()
+        elif self.virtual_list:
+            # Changed tasks are the same objects, so rendering shows them
+            self.virtual_list.remove_tasks(removed)
+        else:
+            items = [item for item in removed_items if item is not None]
+            self.task_tree.delete(*items)
+            self.hidden_selection.difference_update(items)
+            for task in updated:
+                self.render_row(self.store.index.item_for_task(task["id"]), task)
+        if added and not self.store.queryable:
+            self.show_new_tasks(added)
+            
+        # Changed tasks may now sort elsewhere or fall out of the filter
+        if updated and (self.sorted_view() or self.filter_type != "all" or self.search_text):
+            self.filter_tasks(self.filter_type)
+        self.schedule_refresh("stats", "timers")
+        
+    def start_api_server(self, port):
+        """Serve the tasks over local HTTP from a background thread
+
+        Requests are run on the Tk thread through a TkBridge, once loading
+        has finished, and show up in the list like another window's changes.
+        """
+        try:
+            sock = bind(DEFAULT_HOST, port)
+        except OSError as e:
+            messagebox.showerror("Error", f"Failed to start the API server: {str(e)}")
+            return
+        self.change_feed = ChangeFeed()
+        bridge = TkBridge(self.root, ready=lambda: not self.loading)
+        api = TaskApi(self.store, self.apply_api_changes)
+        self.api_server = TaskServer(api, bridge.call, self.change_feed)
+        self.api_server.serve_in_thread(sock)
+        
+    def apply_api_changes(self, changes):
+        """Show and save a change made through the API"""
+        self.show_external_changes(changes)
+        self.schedule_save()
+        
+    def publish(self, kind, tasks=()):
+        """Send a change made in this window to API event streams"""
+        if self.change_feed is not None:
+            self.change_feed.publish(kind, tasks)
+            
     def load_tasks_from_file(self):
-        """Load tasks from a JSON file"""
+        """Load tasks from the storage backend without blocking the window
+
+        File-backed storage is streamed from disk on a worker thread and handed
+        to the Tk thread in chunks, so the first rows appear right away and the
+        file is never read into memory whole.
+        """
+        if self.store.queryable:
+            self.open_query_storage()
+            return
+        
+        self.loading = True
+        self.load_started = time.perf_counter()
+        self.load_queue = queue.Queue()
+        self.set_editing_enabled(False)
+        self.show_loading_progress()
+        threading.Thread(target=self.read_tasks_in_background, daemon=True).start()
+        self.root.after(LOAD_POLL_INTERVAL, self.poll_loaded_tasks)
+        
+    def open_query_storage(self):
+        """Open a queryable backend; only the visible rows are ever fetched"""
         try:
-            if os.path.exists(self.tasks_file):
-                with open(self.tasks_file, 'r') as file:
-                    self.tasks = json.load(file)
-                    
-                # Clear existing items in treeview
-                for item in self.task_tree.get_children():
-                    self.task_tree.delete(item)
-                    
-                # Add tasks to treeview
-                for task in self.tasks:
-                    item_id = self.task_tree.insert("", tk.END, values=(
-                        task["task"], task["category"], task["priority"], 
-                        task["due_date"], task["status"]
-                    ))
-                    
-                    # Apply styling
-                    if task["status"] == "Completed":
-                        self.task_tree.tag_configure(f"completed_{task['task']}", background=self.colors["completed"])
-                        self.task_tree.item(item_id, tags=(f"completed_{task['task']}",))
-                    elif task["priority"] == "High":
-                        self.task_tree.tag_configure(f"priority_{task['id']}", background="#FFEBEE")
-                        self.task_tree.item(item_id, tags=(f"priority_{task['id']}",))
-                    elif task["priority"] == "Medium":
-                        self.task_tree.tag_configure(f"priority_{task['id']}", background="#FFF8E1")
-                        self.task_tree.item(item_id, tags=(f"priority_{task['id']}",))
+            self.store.load()
+            self.refresh_virtual_list(keep_position=False)
+            self.update_stats()
+            self.show_loaded_message(len(self.store))
+        except Exception as e:
+            self.loading = True
+            self.fail_loading(e)
+            return
+        self.run_timers()
+            
+    def read_tasks_in_background(self):
+        """Worker thread: stream the tasks and queue them in chunks for the UI"""
+        try:
+            for tasks in self.store.stream_saved():
+                self.load_queue.put(("tasks", tasks))
+            self.load_queue.put(("done", None))
+        except Exception as e:
+            self.load_queue.put(("error", e))
+            
+    def poll_loaded_tasks(self):
+        """Move loaded chunks into the list, a few milliseconds at a time"""
+        deadline = time.perf_counter() + LOAD_POLL_BUDGET
+        while time.perf_counter() < deadline:
+            try:
+                kind, payload = self.load_queue.get_nowait()
+            except queue.Empty:
+                break
+            
+            if kind == "tasks":
+                self.add_loaded_tasks(payload)
+            elif kind == "done":
+                self.finish_loading()
+                return
+            else:
+                self.fail_loading(payload)
+                return
+            
+        self.update_stats()
+        self.show_loading_progress()
+        self.root.after(LOAD_POLL_INTERVAL, self.poll_loaded_tasks)
+        
+    def add_loaded_tasks(self, tasks):
+        """Index, count and show one chunk of loaded tasks"""
+        self.store.add_loaded(tasks)
+        self.show_new_tasks(tasks)
+        
+    def show_new_tasks(self, tasks):
+        """Show tasks added to the store, in one list update"""
+        # Growing past the virtualization threshold moves the whole list over
+        if self.virtual is None and not self.virtual_list and len(self.store) >= VIRTUAL_LIST_THRESHOLD:
+            self.enable_virtual_list()
+            self.refresh_virtual_list()
+        elif self.store.queryable or (self.virtual_list and self.sorted_view()):
+            self.refresh_virtual_list()
+        elif self.virtual_list:
+            self.virtual_list.rows.extend(task for task in tasks if self.matches_filter(task))
+            self.virtual_list.render()
+        else:
+            # Rows the filter hides are created too, then detached in one call
+            hidden = []
+            for task in tasks:
+                item_id = self.insert_task_row(task)
+                if not self.matches_filter(task):
+                    hidden.append(item_id)
+            self.task_tree.detach(*hidden)
+            
+            # New rows were appended; a sorted view puts them in place
+            if self.sorted_view():
+                self.filter_tasks(self.filter_type)
                 
-                # Update stats
-                self.update_stats()
+    def sorted_view(self):
+        """Whether the list is in some order other than the order tasks were added"""
+        return self.sort_key is not None or self.filter_type in DUE_FILTERS
                 
-                # Show a brief status message
-                if self.tasks:
-                    status_label = tk.Label(
-                        self.root, 
-                        text=f"Loaded {len(self.tasks)} tasks from file", 
-                        bg=self.colors["secondary"],
-                        fg="white",
-                        font=self.button_font,
-                        padx=10,
-                        pady=5
-                    )
-                    status_label.place(relx=0.5, rely=0.9, anchor="center")
-                    # Remove the message after 2 seconds
-                    self.root.after(2000, status_label.destroy)
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load tasks: {str(e)}")
+    def finish_loading(self):
+        """Hide the progress indicator and allow editing again"""
+        self.loading = False
+        self.loading_frame.place_forget()
+        if self.profiler is not None:
+            # The timed call only starts the loader; this is the whole load
+            self.profiler.record("load until done", self.load_started, time.perf_counter())
+        self.set_editing_enabled(True)
+        self.update_stats()
+        self.show_loaded_message(len(self.store))
+        self.run_timers()
+        
+    def fail_loading(self, error):
+        """Stop at a load error and leave the window read-only
+
+        The store holds only what was read before the error, or nothing if
+        the backend could not be opened, so saving it would overwrite the
+        tasks that did not load. loading stays set, which keeps editing,
+        saving, polling and the API off until the app is restarted.
+        """
+        self.loading_frame.place_forget()
+        self.set_editing_enabled(False)
+        self.update_stats()
+        messagebox.showerror("Error", f"Failed to load tasks: {str(error)}\n\n"
+                             "Editing is turned off so the task file is not overwritten. "
+                             "Restart TaskMaster to try again.")
+        
+    def set_editing_enabled(self, enabled):
+        """Enable or disable the controls that change tasks"""
+        state = tk.NORMAL if enabled else tk.DISABLED
+        for button in (self.add_button, self.bulk_add_button, self.mark_done_button,
+                       self.remove_button, self.clear_button, self.save_button):
+            button.config(state=state)
+        self.update_history_buttons()
+            
+    def show_loading_progress(self):
+        """Show how far loading has got in the status message area"""
+        # The file is streamed, so the total is only known once it is done
+        self.loading_label.config(text=f"Loading tasks... {len(self.store)} so far")
+        self.loading_bar.step()
+        self.loading_frame.place(relx=0.5, rely=0.9, anchor="center")
+        
+    def show_loaded_message(self, count):
+        """Show a brief status message after loading"""
+        if count:
+            self.show_toast(f"Loaded {count} tasks from file", self.colors["secondary"])
     
     def on_closing(self):
         """Handle window closing event"""
-        # Save tasks before closing
-        self.save_tasks_to_file()
+        # Save pending changes before closing; a load still running or failed has nothing to save
+        if not self.loading:
+            self.flush_pending_save()
+            self.store.close()
+        if self.profiler is not None:
+            self.profiler.close()
+        if self.api_server is not None:
+            self.api_server.stop()
+        if self.timer_job is not None:
+            self.root.after_cancel(self.timer_job)
         # Destroy the window
         self.root.destroy()
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="TaskMaster Pro")
+    parser.add_argument("--storage", choices=STORAGE_BACKENDS, default="json",
+                        help="how tasks are persisted (default: json)")
+    parser.add_argument("--profile", nargs="?", const="1", default=os.environ.get(PROFILE_ENV),
+                        metavar="FILE",
+                        help="time hot paths in a sidebar panel; with FILE, also write a cProfile "
+                             f"dump (.prof) or a trace (.json) on exit (or set {PROFILE_ENV})")
+    parser.add_argument("--serve", nargs="?", type=int, const=DEFAULT_PORT, metavar="PORT",
+                        help=f"also serve the tasks over local HTTP (default port: {DEFAULT_PORT})")
+    args = parser.parse_args()
+    
     root = tk.Tk()
-    app = ProfessionalToDoApp(root)
+    app = ProfessionalToDoApp(root, storage=args.storage, profiler=make_profiler(args.profile),
+                              serve_port=args.serve)
     root.mainloop()
\ No newline at end of file
@@ -0,0 +1,146 @@
+"""Load-test the local task API with concurrent keep-alive clients
+
+Starts a headless task_server.py on a generated task file (or uses the
+server at --url), then runs --connections clients for --seconds, each
+sending a mix of page reads, single-task reads and toggles, and prints
+requests per second and latency percentiles:
+
+    python benchmarks/api_load.py --tasks 10000 --connections 50 --seconds 10
+    python benchmarks/api_load.py --url http://127.0.0.1:8765
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_tasks import generate_tasks
+from task_profiling import percentile
+from task_storage import write_json_atomic
+
+# Share of each request kind in the mix
+MIX = {"page": 0.4, "get": 0.4, "toggle": 0.2}
+
+# Tasks per page read
+PAGE_LIMIT = 50
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(directory, size, port):
+    """Run task_server.py on size generated tasks until it accepts connections"""
+    path = os.path.join(directory, "tasks.json")
+    write_json_atomic(path, generate_tasks(size, "balanced", 1))
+    server = subprocess.Popen([sys.executable, os.path.join(ROOT, "task_server.py"),
+                               "--tasks-file", path, "--port", str(port)], stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return server
+        except OSError:
+            if server.poll() is not None:
+                sys.exit("error: task_server.py exited while starting")
+            time.sleep(0.05)
+    server.kill()
+    sys.exit("error: task_server.py did not start listening")
+
+
+async def request(reader, writer, method, path):
+    """Send one request on a keep-alive connection and return its status and JSON body"""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: 0\r\n\r\n".encode())
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split(" ")[1])
+    length = next(int(line.split(":")[1]) for line in lines if line.lower().startswith("content-length:"))
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def client(host, port, task_ids, until, latencies, errors, seed):
+    rng = random.Random(seed)
+    kinds, weights = zip(*MIX.items())
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < until:
+            kind = rng.choices(kinds, weights)[0]
+            if kind == "page":
+                method, path = "GET", f"/tasks?filter=active&limit={PAGE_LIMIT}&offset={rng.randrange(1000)}"
+            elif kind == "get":
+                method, path = "GET", f"/tasks/{rng.choice(task_ids)}"
+            else:
+                method, path = "POST", f"/tasks/{rng.choice(task_ids)}/toggle"
+            start = time.perf_counter()
+            status, _ = await request(reader, writer, method, path)
+            latencies[kind].append(time.perf_counter() - start)
+            if status >= 400:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def run(host, port, connections, seconds):
+    reader, writer = await asyncio.open_connection(host, port)
+    _, page = await request(reader, writer, "GET", f"/tasks?limit={PAGE_LIMIT * 20}")
+    writer.close()
+    task_ids = [task["id"] for task in page["tasks"]]
+    if not task_ids:
+        sys.exit("error: the server has no tasks to request")
+
+    latencies = {kind: [] for kind in MIX}
+    errors = []
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, task_ids, start + seconds, latencies, errors, seed)
+                           for seed in range(connections)))
+    return time.perf_counter() - start, latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="server to test instead of starting one")
+    parser.add_argument("--tasks", type=int, default=10000, help="tasks in the generated file")
+    parser.add_argument("--connections", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="taskmaster-api-") as scratch:
+        server = None
+        if args.url:
+            url = urlsplit(args.url)
+            host, port = url.hostname, url.port
+        else:
+            host, port = "127.0.0.1", free_port()
+            server = start_server(scratch, args.tasks, port)
+        try:
+            elapsed, latencies, errors = asyncio.run(run(host, port, args.connections, args.seconds))
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+
+    total = sum(len(samples) for samples in latencies.values())
+    print(f"{total} requests in {elapsed:.1f}s over {args.connections} connections: "
+          f"{total / elapsed:.0f} requests/s, {len(errors)} errors")
+    for kind, samples in latencies.items():
+        if samples:
+            print(f"{kind:<8} {len(samples):8d}  p50 {percentile(samples, 0.5) * 1000:6.2f} ms  "
+                  f"p99 {percentile(samples, 0.99) * 1000:6.2f} ms")
+    if errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
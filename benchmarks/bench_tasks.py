@@ -0,0 +1,300 @@
+"""Benchmark loading, saving, filtering, stats and task lookups at scale
+
+Generates synthetic task files, then times each path once per storage
+backend. Every configuration runs in its own subprocess so its peak memory
+is measured in isolation. Results are written as JSON and can be compared
+with an earlier run to catch regressions:
+
+    python benchmarks/bench_tasks.py --sizes 1000 100000 --output new.json
+    python benchmarks/bench_tasks.py --sizes 1000 100000 --compare old.json
+
+Filter and search timings start from an empty view cache; the matching
+*_cached_s metrics time the same query asked again.
+
+Headless runs time TaskStore directly. --gui also times the real window
+(load until rows are shown, filter switches, toggles and removals); it needs
+a display, so on a server run it under Xvfb:
+
+    xvfb-run python benchmarks/bench_tasks.py --gui --sizes 10000
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from task_storage import STORAGE_BACKENDS, TASKS_FILE, open_storage
+from task_store import CATEGORIES, PRIORITIES, TaskStore
+
+
+# Category, priority and completed-share mixes for the generated tasks
+MIXES = {
+    "balanced": {"categories": (1, 1, 1, 1, 1), "priorities": (1, 1, 1), "completed": 0.5},
+    "work-heavy": {"categories": (8, 1, 0.5, 0.5, 0), "priorities": (6, 3, 1), "completed": 0.2},
+    "mostly-done": {"categories": (2, 2, 2, 1, 1), "priorities": (1, 2, 4), "completed": 0.9},
+}
+
+WORDS = ("buy", "call", "write", "review", "plan", "fix", "book", "send", "clean", "read",
+         "report", "milk", "doctor", "invoice", "meeting", "garden", "tickets", "budget", "email", "code")
+
+# Search term used by the search benchmark; present in a share of titles
+SEARCH_TERM = "rev"
+
+# Rows the UI would show after a filter change
+VISIBLE_ROWS = 50
+
+# Lookups timed per mutation benchmark
+SAMPLE_SIZE = 200
+
+
+def generate_tasks(count, mix, seed):
+    rng = random.Random(seed)
+    weights = MIXES[mix]
+    categories = rng.choices(CATEGORIES, weights["categories"], k=count)
+    priorities = rng.choices(PRIORITIES, weights["priorities"], k=count)
+    return [
+        {
+            "id": task_id,
+            "task": " ".join(rng.choice(WORDS) for _ in range(3)) + f" {task_id}",
+            "category": categories[task_id],
+            "priority": priorities[task_id],
+            "due_date": f"{rng.randint(1, 12):02d}/{rng.randint(1, 28):02d}/{rng.randint(2024, 2027)}",
+            "status": "Completed" if rng.random() < weights["completed"] else "Pending",
+        }
+        for task_id in range(count)
+    ]
+
+
+def timed(func, repeat=1, setup=None):
+    """Best wall time of func over repeat runs, calling setup untimed before each"""
+    best = float("inf")
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def peak_rss_bytes():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def open_store(backend, path):
+    store = TaskStore(open_storage(backend, path))
+    store.load()
+    return store
+
+
+def show(rows):
+    """What the list needs after a query: the count and the first screenful"""
+    return len(rows), rows[:VISIBLE_ROWS]
+
+
+def bench_headless(directory, backend, size, repeat, seed):
+    path = os.path.join(directory, TASKS_FILE)
+    # One-time migrations, and converting the file to binary, are not part of load
+    store = open_store(backend, path)
+    store.save()
+    store.close()
+    results = {}
+    
+    tracemalloc.start()
+    store = open_store(backend, path)
+    results["load_peak_traced_bytes"] = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    store.close()
+    
+    start = time.perf_counter()
+    store = open_store(backend, path)
+    results["load_s"] = time.perf_counter() - start
+    
+    # Cold queries start from an empty view cache; cached ones ask again right after
+    queries = {
+        "filter_all": lambda: show(store.query("all")),
+        "filter_active": lambda: show(store.query("active")),
+        "filter_completed": lambda: show(store.query("completed")),
+        "search": lambda: show(store.query("all", SEARCH_TERM)),
+    }
+    for name, query in queries.items():
+        results[f"{name}_s"] = timed(query, repeat, setup=store.views.clear)
+        results[f"{name}_cached_s"] = timed(query, repeat)
+    results["stats_s"] = timed(store.stats, repeat)
+    
+    sample = random.Random(seed).sample(range(size), min(SAMPLE_SIZE, size))
+    start = time.perf_counter()
+    for task_id in sample:
+        store.toggle(task_id)
+    results["toggle_op_s"] = (time.perf_counter() - start) / len(sample)
+    results["save_s"] = timed(store.save)
+    
+    start = time.perf_counter()
+    for task_id in sample:
+        store.remove(task_id)
+    results["remove_op_s"] = (time.perf_counter() - start) / len(sample)
+    store.save()
+    store.close()
+    return results
+
+
+def bench_gui(directory, backend, size, repeat, seed):
+    import tkinter as tk
+    from To_do_list import ProfessionalToDoApp
+    
+    # The app opens its task file relative to the working directory
+    os.chdir(directory)
+    results = {}
+    root = tk.Tk()
+    start = time.perf_counter()
+    app = ProfessionalToDoApp(root, storage=backend)
+    root.update()
+    results["window_ready_s"] = time.perf_counter() - start
+    while app.loading:
+        root.update()
+    root.update()
+    results["load_s"] = time.perf_counter() - start
+    
+    def switch(filter_type):
+        app.filter_tasks(filter_type)
+        root.update()
+    for filter_type in ("active", "completed", "all"):
+        results[f"filter_{filter_type}_s"] = timed(lambda: switch(filter_type), repeat,
+                                                   setup=app.store.views.clear)
+        results[f"filter_{filter_type}_cached_s"] = timed(lambda: switch(filter_type), repeat)
+    results["stats_s"] = timed(app.update_stats, repeat)
+    
+    def act_on_first_row(action):
+        app.task_tree.selection_set(app.task_tree.get_children()[0])
+        root.update()
+        start = time.perf_counter()
+        action()
+        root.update()
+        return time.perf_counter() - start
+    count = min(SAMPLE_SIZE // 10, size)
+    results["toggle_op_s"] = sum(act_on_first_row(app.mark_as_done) for _ in range(count)) / count
+    results["remove_op_s"] = sum(act_on_first_row(app.remove_task) for _ in range(count)) / count
+    results["save_s"] = timed(app.save_tasks_to_file)
+    app.on_closing()
+    return results
+
+
+def run_worker(args):
+    bench = bench_gui if args.mode == "gui" else bench_headless
+    results = bench(args.directory, args.backend, args.size, args.repeat, args.seed)
+    results["peak_rss_bytes"] = peak_rss_bytes()
+    json.dump(results, sys.stdout)
+    
+    
+def run_config(directory, mode, backend, size, args):
+    command = [sys.executable, os.path.abspath(__file__), "--worker",
+               "--mode", mode, "--directory", directory, "--backend", backend,
+               "--size", str(size), "--repeat", str(args.repeat), "--seed", str(args.seed)]
+    output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+    return json.loads(output)
+
+
+def compare(previous, current, tolerance, min_delta):
+    """Print metrics that got worse by more than tolerance; return how many
+
+    Timings that moved by less than min_delta seconds are treated as noise.
+    """
+    def key(row):
+        return (row["mode"], row["backend"], row["mix"], row["size"], row["metric"])
+    before = {key(row): row["value"] for row in previous["results"]}
+    regressions = 0
+    for row in current["results"]:
+        old = before.get(key(row))
+        if not old or row["value"] <= old * (1 + tolerance):
+            continue
+        if row["metric"].endswith("_s") and row["value"] - old < min_delta:
+            continue
+        regressions += 1
+        print(f"REGRESSION {'/'.join(map(str, key(row)))}: {old:.6g} -> {row['value']:.6g}"
+              f" ({row['value'] / old - 1:+.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 1000000])
+    parser.add_argument("--mixes", nargs="+", choices=MIXES, default=["balanced"])
+    parser.add_argument("--backends", nargs="+", choices=STORAGE_BACKENDS, default=list(STORAGE_BACKENDS))
+    parser.add_argument("--gui", action="store_true", help="also time the Tk window (needs a display)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per read-only timing, best kept")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="earlier results file to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before flagging")
+    parser.add_argument("--min-delta", type=float, default=0.001,
+                        help="seconds a timing must grow by before it can be flagged")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--mode", default="headless", help=argparse.SUPPRESS)
+    parser.add_argument("--directory", help=argparse.SUPPRESS)
+    parser.add_argument("--backend", help=argparse.SUPPRESS)
+    parser.add_argument("--size", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.worker:
+        run_worker(args)
+        return
+    
+    modes = ["headless", "gui"] if args.gui else ["headless"]
+    rows = []
+    with tempfile.TemporaryDirectory(prefix="taskmaster-bench-") as scratch:
+        for mix in args.mixes:
+            for size in args.sizes:
+                source = os.path.join(scratch, f"{mix}-{size}.json")
+                with open(source, 'w') as file:
+                    json.dump(generate_tasks(size, mix, args.seed), file)
+                    
+                for mode in modes:
+                    for backend in args.backends:
+                        # Fresh copy per run: runs mutate their task files
+                        directory = tempfile.mkdtemp(dir=scratch)
+                        shutil.copy(source, os.path.join(directory, TASKS_FILE))
+                        results = run_config(directory, mode, backend, size, args)
+                        shutil.rmtree(directory)
+                        for metric, value in results.items():
+                            rows.append({"mode": mode, "backend": backend, "mix": mix, "size": size,
+                                         "metric": metric, "value": value})
+                        print(f"{mode:>8} {backend:>8} {mix:>12} {size:>8}  "
+                              f"load {results['load_s']:.3f}s  "
+                              f"filter {results['filter_active_s'] * 1000:.1f}ms  "
+                              f"toggle {results['toggle_op_s'] * 1e6:.0f}us  "
+                              f"peak {results['peak_rss_bytes'] / 2**20:.0f}MB")
+                os.remove(source)
+                
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "seed": args.seed,
+        },
+        "results": rows,
+    }
+    with open(args.output, 'w') as file:
+        json.dump(report, file, indent=1)
+    print(f"Wrote {len(rows)} measurements to {args.output}")
+    
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(json.load(file), report, args.tolerance, args.min_delta)
+        print(f"{regressions} regressions beyond {args.tolerance:.0%}")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
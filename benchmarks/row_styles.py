@@ -0,0 +1,92 @@
+"""Compare per-task row tags with the shared ROW_STYLES tags
+
+Fills a Treeview with synthetic tasks twice: once tagging every row with its
+own tag (how rows were styled before ROW_STYLES), once with the shared tags.
+For each run it prints the number of Tcl tags on the tree and the time to
+insert the rows and to redraw the window.
+
+Needs a display; on a headless machine run it under Xvfb:
+
+    xvfb-run python benchmarks/row_styles.py --tasks 50000
+"""
+import argparse
+import os
+import sys
+import time
+import tkinter as tk
+from tkinter import ttk
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from To_do_list import ROW_STYLES
+
+
+PRIORITIES = ("High", "Medium", "Low")
+
+
+def synthetic_tasks(count):
+    return [
+        {"id": i, "task": f"Task {i}", "category": "Work", "priority": PRIORITIES[i % 3],
+         "due_date": "MM/DD/YYYY", "status": "Completed" if i % 4 == 0 else "Pending"}
+        for i in range(count)
+    ]
+
+
+def legacy_tag(tree, task):
+    """One tag per task, configured as each row is inserted"""
+    if task["status"] == "Completed":
+        tag = f"completed_{task['task']}"
+        tree.tag_configure(tag, background=ROW_STYLES["completed"]["background"])
+    else:
+        tag = f"priority_{task['id']}"
+        tree.tag_configure(tag, background=ROW_STYLES[task["priority"].lower()]["background"])
+    return tag
+
+
+def shared_tag(tree, task):
+    return "completed" if task["status"] == "Completed" else task["priority"].lower()
+
+
+def measure(root, tasks, tag_for):
+    tree = ttk.Treeview(root, columns=("task", "priority", "status"), show="headings")
+    tree.pack(fill=tk.BOTH, expand=True)
+    for tag, style in ROW_STYLES.items():
+        tree.tag_configure(tag, **style)
+    root.update()
+    
+    start = time.perf_counter()
+    for task in tasks:
+        tree.insert("", tk.END, values=(task["task"], task["priority"], task["status"]),
+                    tags=(tag_for(tree, task),))
+    insert_time = time.perf_counter() - start
+    
+    # Redraw: scroll through the list, forcing a repaint each step
+    start = time.perf_counter()
+    for step in range(20):
+        tree.yview_moveto(step / 20)
+        root.update()
+    redraw_time = (time.perf_counter() - start) / 20
+    
+    tag_count = len(tree.tk.splitlist(tree.tk.call(tree, "tag", "names")))
+    tree.destroy()
+    return tag_count, insert_time, redraw_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=50000)
+    args = parser.parse_args()
+    
+    root = tk.Tk()
+    root.geometry("800x600")
+    tasks = synthetic_tasks(args.tasks)
+    print(f"{args.tasks} tasks")
+    print(f"{'tags':>10} {'tcl tags':>10} {'insert s':>10} {'redraw ms':>10}")
+    for name, tag_for in (("per-task", legacy_tag), ("shared", shared_tag)):
+        tag_count, insert_time, redraw_time = measure(root, tasks, tag_for)
+        print(f"{name:>10} {tag_count:>10} {insert_time:>10.2f} {redraw_time * 1000:>10.1f}")
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Measure memory per task for saved dicts, Task objects and a loaded TaskStore
+
+Loads a generated task file as saved dicts, as Task objects and as a
+TaskStore, with and without its title search index, under tracemalloc and
+prints bytes per task for each. Then saves the loaded tasks and checks the
+JSON file round-trips unchanged:
+
+    python benchmarks/task_memory.py --size 1000000
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_tasks import MIXES, generate_tasks
+from task_model import Task
+from task_storage import JsonTaskStorage, write_json_atomic
+from task_store import TaskStore
+
+
+def traced(build):
+    """Bytes still allocated by build()'s result, and the result itself"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size, time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=1000000)
+    parser.add_argument("--mix", choices=MIXES, default="balanced")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="taskmaster-memory-") as scratch:
+        path = os.path.join(scratch, "tasks.json")
+
+        # Save in the current format (with due days) so the round trip is exact
+        records = [Task.from_record(record) for record in generate_tasks(args.size, args.mix, args.seed)]
+        write_json_atomic(path, records)
+        del records
+
+        def load_dicts():
+            with open(path) as file:
+                return json.load(file)
+
+        rows = []
+        size, seconds, dicts = traced(load_dicts)
+        rows.append(("saved dicts (json.load)", size, seconds))
+        del dicts
+
+        storage = JsonTaskStorage(path)
+        size, seconds, tasks = traced(lambda: TaskStore(storage).read_saved())
+        rows.append(("Task objects", size, seconds))
+        del tasks
+
+        def load_store():
+            store = TaskStore(storage)
+            store.load()
+            return store
+        size, seconds, store = traced(load_store)
+        rows.append(("TaskStore with indexes", size, seconds))
+
+        def load_store_without_search():
+            without_search = load_store()
+            without_search.search_index.clear()
+            return without_search
+        size, seconds, without_search = traced(load_store_without_search)
+        rows.append(("  without the search index", size, seconds))
+        del without_search
+
+        for name, size, seconds in rows:
+            print(f"{name:<26} {size / args.size:8.0f} bytes/task  {size / 2**20:8.1f} MB  ({seconds:.1f}s traced)")
+
+        copy_path = os.path.join(scratch, "copy.json")
+        JsonTaskStorage(copy_path).save(store.index)
+        with open(path) as original, open(copy_path) as copy:
+            same = json.load(original) == json.load(copy)
+        print(f"JSON round trip: {'identical' if same else 'DIFFERENT'}")
+        if not same:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
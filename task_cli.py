@@ -0,0 +1,124 @@
+"""Batch operations on TaskMaster Pro tasks, without the GUI
+
+Runs against the same storage backends as the app but never imports
+tkinter, so it works on machines without a display:
+
+    python task_cli.py import tasks.csv
+    python task_cli.py export done.json --status completed
+    python task_cli.py complete --category Shopping
+    python task_cli.py --storage sqlite stats
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+
+from task_storage import (STORAGE_BACKENDS, TASKS_FILE, open_storage,
+                          read_task_records, write_task_records)
+from task_store import CATEGORIES, PRIORITIES, STATUS_FILTERS, TaskStore
+
+
+def add_selectors(parser):
+    """Options choosing which tasks a command applies to"""
+    parser.add_argument("--status", choices=STATUS_FILTERS, default="all",
+                        help="only tasks with this status filter (default: all)")
+    parser.add_argument("--search", default="", help="only tasks whose title matches")
+    parser.add_argument("--category", choices=CATEGORIES, help="only tasks in this category")
+    parser.add_argument("--priority", choices=PRIORITIES, help="only tasks with this priority")
+    parser.add_argument("--ids", type=lambda text: [int(part) for part in text.split(",")],
+                        help="only these comma-separated task IDs")
+    
+    
+def selected_tasks(store, args):
+    if args.ids is not None:
+        return [task for task in store.get_many(args.ids)
+                if store.matches(task, args.status, args.search, args.category, args.priority)]
+    return store.query(args.status, args.search, args.category, args.priority)
+
+
+def import_tasks(store, args):
+    tasks = store.add_many(read_task_records(args.path))
+    print(f"Imported {len(tasks)} tasks")
+    return True
+
+
+def export_tasks(store, args):
+    tasks = selected_tasks(store, args)
+    extension = os.path.splitext(args.path)[1].lower()
+    if args.path == "-":
+        write_task_records(sys.stdout, tasks, extension)
+    else:
+        with open(args.path, 'w', newline="") as file:
+            write_task_records(file, tasks, extension)
+        print(f"Exported {len(tasks)} tasks to {args.path}", file=sys.stderr)
+    return False
+
+
+def set_status(status):
+    def command(store, args):
+        # Collect IDs first: changing status can reorder a lazy query
+        task_ids = [task["id"] for task in selected_tasks(store, args)]
+        store.set_status_many(task_ids, status)
+        print(f"Marked {len(task_ids)} tasks as {status}")
+        return True
+    return command
+
+
+def remove_tasks(store, args):
+    task_ids = [task["id"] for task in selected_tasks(store, args)]
+    store.remove_many(task_ids)
+    print(f"Removed {len(task_ids)} tasks")
+    return True
+
+
+def show_stats(store, args):
+    print(json.dumps(store.stats(), indent=2))
+    return False
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch operations on TaskMaster Pro tasks")
+    parser.add_argument("--storage", choices=STORAGE_BACKENDS, default="json",
+                        help="how tasks are persisted (default: json)")
+    parser.add_argument("--tasks-file", default=TASKS_FILE, help=f"task file (default: {TASKS_FILE})")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    command = commands.add_parser("import", help="add tasks from a .json, .csv or plain text file")
+    command.add_argument("path")
+    command.set_defaults(handler=import_tasks)
+    
+    command = commands.add_parser("export", help="write tasks to a .json or .csv file ('-' for stdout)")
+    command.add_argument("path")
+    add_selectors(command)
+    command.set_defaults(handler=export_tasks)
+    
+    for name, status in (("complete", "Completed"), ("reopen", "Pending")):
+        command = commands.add_parser(name, help=f"mark the selected tasks as {status}")
+        add_selectors(command)
+        command.set_defaults(handler=set_status(status))
+        
+    command = commands.add_parser("remove", help="delete the selected tasks")
+    add_selectors(command)
+    command.set_defaults(handler=remove_tasks)
+    
+    command = commands.add_parser("stats", help="print dashboard counts as JSON")
+    command.set_defaults(handler=show_stats)
+    
+    args = parser.parse_args(argv)
+    try:
+        store = TaskStore(open_storage(args.storage, args.tasks_file))
+        store.load()
+    except (RuntimeError, OSError, ValueError, sqlite3.Error) as e:
+        sys.exit(f"error: {e}")
+    try:
+        if args.handler(store, args):
+            store.save()
+    except (ValueError, OSError, sqlite3.Error) as e:
+        sys.exit(f"error: {e}")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
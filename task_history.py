@@ -0,0 +1,63 @@
+from collections import deque
+
+
+# Undo steps kept; the oldest is dropped once there are more
+HISTORY_LIMIT = 100
+
+
+class Step:
+    """One undoable change to the tasks
+
+    kind is "add", "remove" or "clear" with the Task objects concerned, or
+    "status" with the new status and each task's previous one.
+    """
+
+    __slots__ = ("kind", "tasks", "status", "previous")
+
+    def __init__(self, kind, tasks, status=None, previous=None):
+        self.kind = kind
+        self.tasks = tasks
+        self.status = status
+        self.previous = previous
+
+
+class UndoHistory:
+    """Bounded undo and redo stacks of task changes, kept as deltas
+
+    Steps hold only what changed, never a copy of the task list, so a step
+    costs memory in proportion to the tasks it touched. Undoing applies its
+    inverse; a new change clears everything that could be redone.
+    """
+
+    def __init__(self, limit=HISTORY_LIMIT):
+        self.undo_steps = deque(maxlen=limit)
+        self.redo_steps = deque(maxlen=limit)
+
+    def record(self, kind, tasks, status=None, previous=None):
+        """Remember a change that was just made"""
+        self.undo_steps.append(Step(kind, tasks, status, previous))
+        self.redo_steps.clear()
+
+    def undo(self):
+        """The step to undo, now moved to the redo stack, or None"""
+        if not self.undo_steps:
+            return None
+        step = self.undo_steps.pop()
+        self.redo_steps.append(step)
+        return step
+
+    def redo(self):
+        """The step to redo, now moved back to the undo stack, or None"""
+        if not self.redo_steps:
+            return None
+        step = self.redo_steps.pop()
+        self.undo_steps.append(step)
+        return step
+
+    @property
+    def can_undo(self):
+        return bool(self.undo_steps)
+
+    @property
+    def can_redo(self):
+        return bool(self.redo_steps)
@@ -0,0 +1,451 @@
+import calendar
+import datetime
+import functools
+import heapq
+from bisect import bisect_left
+from collections import Counter, OrderedDict, defaultdict
+
+
+# How due dates are entered and shown; the placeholder means no due date
+DUE_DATE_FORMAT = "%m/%d/%Y"
+DUE_PLACEHOLDER = "MM/DD/YYYY"
+
+# Sort key standing in for "no due date": after every real day
+UNDATED = datetime.date.max.toordinal() + 1
+
+
+def due_ordinal(due_date):
+    """Day number of an MM/DD/YYYY due date, or None if it isn't one"""
+    try:
+        month, day, year = due_date.split("/")
+        return datetime.date(int(year), int(month), int(day)).toordinal()
+    except (AttributeError, TypeError, ValueError):
+        return None
+    
+    
+def parse_due_date(text):
+    """Day number of an entered due date, or None if it was left blank
+
+    Accepts MM/DD/YYYY or YYYY-MM-DD. Raises ValueError for anything else
+    that is not blank or the placeholder.
+    """
+    text = (text or "").strip()
+    if not text or text == DUE_PLACEHOLDER:
+        return None
+    due = due_ordinal(text)
+    if due is None:
+        try:
+            due = datetime.date.fromisoformat(text).toordinal()
+        except ValueError:
+            raise ValueError(f"Due date '{text}' is not a valid MM/DD/YYYY date") from None
+    return due
+
+
+@functools.lru_cache(maxsize=65536)
+def format_due_date(due):
+    """Show a day number as MM/DD/YYYY, or blank for no due date
+
+    Cached, since tasks share a handful of due days and saving formats them all.
+    """
+    return "" if due is None else datetime.date.fromordinal(due).strftime(DUE_DATE_FORMAT)
+
+
+def today_ordinal():
+    return datetime.date.today().toordinal()
+
+
+def next_occurrence(due, rule):
+    """Day number of the occurrence after due under a "daily", "weekly" or "monthly" rule
+
+    A monthly occurrence falls on the same day of the next month, or on its
+    last day if it is shorter; the series then carries on from that day.
+    """
+    if rule == "daily":
+        return due + 1
+    if rule == "weekly":
+        return due + 7
+    date = datetime.date.fromordinal(due)
+    year, month = divmod(date.month, 12)
+    year += date.year
+    return date.replace(year=year, month=month + 1,
+                        day=min(date.day, calendar.monthrange(year, month + 1)[1])).toordinal()
+
+
+def catch_up(due, rule, today):
+    """The latest occurrence after due that falls on or before today, or None if none has yet
+
+    Occurrences in between are skipped rather than listed, so a repeating
+    task left for months still only needs one new occurrence.
+    """
+    day = next_occurrence(due, rule)
+    if day > today:
+        return None
+    following = next_occurrence(day, rule)
+    while following <= today:
+        day, following = following, next_occurrence(following, rule)
+    return day
+
+
+class TaskIndex:
+    """Tasks keyed by stable ID, plus the Treeview items that show them
+
+    IDs come from a counter that only moves forward, so an ID is never reused
+    after its task is removed. Lookups by ID or by Treeview item are O(1),
+    and iteration yields tasks in the order they were added.
+    """
+
+    def __init__(self, tasks=()):
+        self.tasks = {}
+        self.next_id = 0
+        self.item_tasks = {}
+        self.task_items = {}
+        for task in tasks:
+            self.add(task)
+            
+    def __len__(self):
+        return len(self.tasks)
+    
+    def __iter__(self):
+        return iter(self.tasks.values())
+    
+    def __reversed__(self):
+        return reversed(self.tasks.values())
+    
+    def __contains__(self, task_id):
+        return task_id in self.tasks
+    
+    def new_id(self):
+        """Hand out the next unused task ID"""
+        task_id = self.next_id
+        self.next_id += 1
+        return task_id
+    
+    def add(self, task):
+        self.tasks[task["id"]] = task
+        self.next_id = max(self.next_id, task["id"] + 1)
+        
+    def get(self, task_id):
+        return self.tasks.get(task_id)
+    
+    def insert(self, tasks):
+        """Add tasks that were removed before, keeping iteration in ID order"""
+        last = next(reversed(self.tasks), -1)
+        for task in tasks:
+            self.add(task)
+        if tasks and min(task["id"] for task in tasks) < last:
+            self.tasks = dict(sorted(self.tasks.items()))
+    
+    def remove(self, task_id):
+        """Drop a task and the link to its Treeview item; returns the task"""
+        item_id = self.task_items.pop(task_id, None)
+        if item_id is not None:
+            del self.item_tasks[item_id]
+        return self.tasks.pop(task_id)
+    
+    def clear(self):
+        self.tasks.clear()
+        self.clear_items()
+        
+    def link(self, item_id, task_id):
+        """Record that a Treeview item shows a task"""
+        self.item_tasks[item_id] = task_id
+        self.task_items[task_id] = item_id
+        
+    def clear_items(self):
+        """Forget all item links, e.g. after the Treeview was emptied"""
+        self.item_tasks.clear()
+        self.task_items.clear()
+        
+    def task_for_item(self, item_id):
+        """The task shown by a Treeview item, or None"""
+        task_id = self.item_tasks.get(item_id)
+        return None if task_id is None else self.tasks.get(task_id)
+    
+    def item_for_task(self, task_id):
+        return self.task_items.get(task_id)
+
+
+class TaskCounters:
+    """Dashboard counts kept up to date on every mutation
+
+    add() and remove() adjust the counts for one task, so reading them never
+    walks the task list. Overdue tasks are counted from pending tasks per due
+    day; that tally is only re-summed when the date rolls over.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.completed = 0
+        self.categories = Counter()
+        self.priorities = Counter()
+        self.pending_due = Counter()
+        self.today = today_ordinal()
+        self.overdue = 0
+        
+    def add(self, task, count=1):
+        self.total += count
+        if task["status"] == "Completed":
+            self.completed += count
+        else:
+            due = task["due"]
+            if due is not None:
+                self.pending_due[due] += count
+                if due < self.today:
+                    self.overdue += count
+        self.categories[task["category"]] += count
+        self.priorities[task["priority"]] += count
+        
+    def remove(self, task):
+        self.add(task, -1)
+        
+    def clear(self):
+        self.__init__()
+        
+    def overdue_count(self):
+        """Pending tasks due before today"""
+        today = today_ordinal()
+        if today != self.today:
+            self.today = today
+            self.overdue = sum(count for due, count in self.pending_due.items() if due < today)
+        return self.overdue
+
+
+class SortedIndex:
+    """Tasks kept sorted by (key(task), ID) with bisect
+
+    keys holds the sorted (key, ID) entries and values the tasks in the
+    same order, so reading an ordering needs no lookups by ID. (Tuples of
+    plain keys, unlike tuples holding tasks, are not tracked by the garbage
+    collector, which matters at a million entries.) A single task is placed
+    with bisect_left on keys and inserted at that position in both lists;
+    bulk loads are appended and sorted once, the next time the index is read.
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self.keys = []
+        self.values = []
+        self.unsorted = False
+        
+    def __len__(self):
+        return len(self.keys)
+    
+    def entry(self, task):
+        return (self.key(task), task["id"])
+    
+    def add(self, task):
+        if self.unsorted:
+            self.keys.append(self.entry(task))
+            self.values.append(task)
+        else:
+            entry = self.entry(task)
+            position = bisect_left(self.keys, entry)
+            self.keys.insert(position, entry)
+            self.values.insert(position, task)
+            
+    def add_many(self, tasks):
+        """Add a batch, deferring the sort until the next lookup"""
+        for task in tasks:
+            self.keys.append(self.entry(task))
+            self.values.append(task)
+        self.unsorted = True
+        
+    def remove(self, task):
+        self.sort()
+        position = bisect_left(self.keys, self.entry(task))
+        if position < len(self.keys) and self.keys[position][1] == task["id"]:
+            del self.keys[position]
+            del self.values[position]
+            
+    def clear(self):
+        self.keys.clear()
+        self.values.clear()
+        self.unsorted = False
+        
+    def sort(self):
+        if self.unsorted:
+            order = sorted(range(len(self.keys)), key=self.keys.__getitem__)
+            self.keys = [self.keys[position] for position in order]
+            self.values = [self.values[position] for position in order]
+            self.unsorted = False
+            
+    def span(self, start=None, end=None):
+        """Positions of the entries with start <= key < end, either end open"""
+        self.sort()
+        low = 0 if start is None else bisect_left(self.keys, (start,))
+        high = len(self.keys) if end is None else bisect_left(self.keys, (end,))
+        return low, high
+    
+    def tasks(self, start=None, end=None):
+        """Tasks with start <= key < end in sort order, either end open"""
+        low, high = self.span(start, end)
+        return self.values[low:high]
+    
+    def first(self, start):
+        """The (key, task) of the first entry with key >= start, or None"""
+        low, high = self.span(start)
+        return (self.keys[low][0], self.values[low]) if low < high else None
+
+
+class ViewCache:
+    """Recently used query results, kept up to date instead of recomputed
+
+    Each view is a SortedIndex of the tasks passing one query, ordered by
+    (sort key, ID), together with the predicate that decides membership.
+    A task added or removed only touches the views it matches, so a status
+    change moves one entry from the views it leaves to the views it joins
+    instead of flushing them. Past max_views views, or max_entries() tasks
+    in all, the least recently used views are dropped; max_entries is
+    called on each put(), so the limit can follow the number of tasks.
+    """
+
+    def __init__(self, max_views, max_entries):
+        self.max_views = max_views
+        self.max_entries = max_entries
+        self.views = OrderedDict()
+        
+    def __len__(self):
+        return len(self.views)
+    
+    def get(self, key):
+        """The SortedIndex cached for key, or None"""
+        view = self.views.get(key)
+        if view is None:
+            return None
+        self.views.move_to_end(key)
+        return view[1]
+    
+    def put(self, key, matches, sort_key, tasks):
+        """Cache tasks as the view for key, ordered by (sort_key(task), ID)"""
+        view = SortedIndex(sort_key)
+        view.add_many(tasks)
+        self.views[key] = (matches, view)
+        max_entries = self.max_entries()
+        while len(self.views) > 1 and (len(self.views) > self.max_views or
+                                       sum(len(view) for _, view in self.views.values()) > max_entries):
+            self.views.popitem(last=False)
+        return view
+    
+    def add(self, task):
+        for matches, view in self.views.values():
+            if matches(task):
+                view.add(task)
+                
+    def add_many(self, tasks):
+        for matches, view in self.views.values():
+            matching = [task for task in tasks if matches(task)]
+            if matching:
+                view.add_many(matching)
+            
+    def remove(self, task):
+        """Drop a task from the views it matches; call before changing its fields"""
+        for matches, view in self.views.values():
+            if matches(task):
+                view.remove(task)
+                
+    def clear(self):
+        self.views.clear()
+
+
+class RecurrenceIndex:
+    """Repeating tasks in a heap by the day their next occurrence is due
+
+    Only the top of the heap is ever looked at. Entries are never searched
+    for either: a task that is removed, loses its rule or moves to another
+    day leaves its entry behind, and get(task_id), the lookup into the live
+    tasks, tells stale entries apart once they reach the top.
+    """
+
+    def __init__(self, get):
+        self.get = get
+        self.heap = []
+        
+    def __len__(self):
+        return len(self.heap)
+    
+    def add(self, task):
+        if task["repeat"] is not None:
+            heapq.heappush(self.heap, (next_occurrence(task["due"], task["repeat"]), task["id"],
+                                       task["due"], task["repeat"]))
+            
+    def add_many(self, tasks):
+        for task in tasks:
+            self.add(task)
+            
+    def clear(self):
+        self.heap.clear()
+        
+    def current(self, entry):
+        day, task_id, due, rule = entry
+        task = self.get(task_id)
+        return task if task is not None and task["due"] == due and task["repeat"] == rule else None
+    
+    def next_day(self):
+        """Day the earliest next occurrence is due, or None"""
+        while self.heap and self.current(self.heap[0]) is None:
+            heapq.heappop(self.heap)
+        return self.heap[0][0] if self.heap else None
+    
+    def due(self, day):
+        """The repeating tasks whose next occurrence is due on or before day, earliest first
+
+        Their entries stay in the heap: each goes stale once its rule moves
+        on to the new occurrence, and a task that fails to advance is still
+        there for the next try. Only the entries due by day and their
+        children are visited, since nothing under a later entry is earlier.
+        """
+        entries = []
+        positions = [0] if self.heap else []
+        while positions:
+            position = positions.pop()
+            if self.heap[position][0] <= day:
+                entries.append(self.heap[position])
+                positions.extend(child for child in (2 * position + 1, 2 * position + 2)
+                                 if child < len(self.heap))
+        tasks = {}
+        for entry in sorted(entries):
+            task = self.current(entry)
+            if task is not None:
+                tasks.setdefault(task["id"], task)
+        return list(tasks.values())
+
+
+def deadline_key(task):
+    return UNDATED if task["due"] is None else task["due"]
+
+
+class DeadlineIndex:
+    """Tasks sorted by (due day, ID), one SortedIndex per status
+
+    Undated tasks sort last under UNDATED. Range lookups bisect into the
+    indexes, so overdue, upcoming and next-due queries cost O(log N + k).
+    """
+
+    def __init__(self):
+        self.statuses = defaultdict(lambda: SortedIndex(deadline_key))
+        
+    def add(self, task):
+        self.statuses[task["status"]].add(task)
+        
+    def add_many(self, tasks):
+        for task in tasks:
+            self.statuses[task["status"]].add_many((task,))
+            
+    def remove(self, task):
+        self.statuses[task["status"]].remove(task)
+        
+    def clear(self):
+        self.statuses.clear()
+        
+    def tasks(self, status, start=None, end=None):
+        """Tasks with a status due on days start <= due < end, in deadline order
+
+        start and end default to the open ends, so undated tasks only show
+        up when end is None.
+        """
+        return self.statuses[status].tasks(start, end)
+    
+    def first(self, status, start):
+        """The earliest task due on or after day start, or None"""
+        entry = self.statuses[status].first(start)
+        return entry[1] if entry is not None and entry[0] != UNDATED else None
@@ -0,0 +1,190 @@
+import contextlib
+import json
+import os
+import threading
+
+from task_model import encode_task
+from task_storage import FileLock, stream_json_tasks, stream_task_file, write_json_atomic
+
+
+# Fold the log into a new snapshot once it grows past this many bytes
+COMPACT_THRESHOLD = 4 * 1024 * 1024
+
+
+def apply_operation(tasks, record):
+    """Apply one journal record to a dict of tasks keyed by ID
+
+    Every operation either sets or deletes whole keys, so replaying a log
+    segment twice leaves the same result as replaying it once.
+    """
+    op = record["op"]
+    if op == "add":
+        tasks[record["task"]["id"]] = record["task"]
+    elif op == "remove":
+        tasks.pop(record["id"], None)
+    elif op == "update":
+        task = tasks.get(record["id"])
+        if task is not None:
+            task.update(record["fields"])
+    elif op == "clear":
+        tasks.clear()
+
+
+def replay_log(tasks, path):
+    """Apply every complete record in a log file and return its valid length
+
+    A crash while appending can leave a torn last line; it is ignored, and
+    the returned byte length lets the caller cut it off before appending.
+    """
+    if not os.path.exists(path):
+        return 0
+    valid_length = 0
+    with open(path, 'rb') as file:
+        for line in file:
+            if not line.endswith(b"\n"):
+                break
+            apply_operation(tasks, json.loads(line))
+            valid_length += len(line)
+    return valid_length
+
+
+class JournalTaskStorage:
+    """Persist tasks as a snapshot plus an append-only log of operations
+
+    Each add, remove and update appends one JSON line to the log, so saving
+    costs O(1) per mutation instead of rewriting every task. Startup reads
+    the latest snapshot and replays the log on top of it. Once the log passes
+    compact_threshold bytes it is sealed and a worker thread folds it into a
+    new snapshot while new operations go to a fresh log.
+
+    The snapshot uses the same JSON array format as JsonTaskStorage. If no
+    journal exists yet, the tasks in the plain JSON file are migrated once.
+
+    Sealing renames the log under other writers, so one instance at a time
+    owns the journal: load() takes an exclusive lock held until close().
+    """
+
+    queryable = False
+
+    def __init__(self, path, compact_threshold=COMPACT_THRESHOLD):
+        base = os.path.splitext(path)[0]
+        self.legacy_path = path
+        self.snapshot_path = base + ".snapshot.json"
+        self.log_path = base + ".journal.jsonl"
+        self.sealed_path = base + ".journal.sealed.jsonl"
+        self.instance_lock = FileLock(base + ".journal.lock")
+        self.compact_threshold = compact_threshold
+        self.log = None
+        self.log_size = 0
+        self.compaction = None
+        
+    def load(self):
+        """Rebuild the task list from the snapshot and the log"""
+        if not self.instance_lock.acquire(blocking=False):
+            raise RuntimeError(f"{self.log_path} is already open in another TaskMaster window")
+        journal_files = (self.snapshot_path, self.log_path, self.sealed_path)
+        if not any(os.path.exists(path) for path in journal_files):
+            self.migrate()
+            
+        tasks = self.read_snapshot()
+        replay_log(tasks, self.sealed_path)
+        valid_length = replay_log(tasks, self.log_path)
+        self.open_log(valid_length)
+        
+        # Finish a compaction that was interrupted by the last shutdown
+        if os.path.exists(self.sealed_path):
+            self.start_compaction()
+        return list(tasks.values())
+    
+    def stream(self):
+        """Yield the rebuilt tasks; the log has to be replayed before any is final"""
+        return iter(self.load())
+    
+    def lock(self):
+        # The instance lock taken by load() already keeps other writers out
+        return contextlib.nullcontext()
+    
+    def changed_externally(self):
+        return False
+    
+    def read_external(self):
+        return None
+    
+    def migrate(self):
+        """One-shot import of the plain JSON task file into a snapshot"""
+        tasks = []
+        if os.path.exists(self.legacy_path):
+            tasks = list(stream_task_file(self.legacy_path))
+        write_json_atomic(self.snapshot_path, tasks)
+        
+    def read_snapshot(self):
+        """Return the snapshot as a dict of tasks keyed by ID"""
+        if not os.path.exists(self.snapshot_path):
+            return {}
+        return {task["id"]: task for task in stream_json_tasks(self.snapshot_path)}
+        
+    def open_log(self, valid_length=0):
+        """Open the log for appending, dropping any torn last record"""
+        self.log = open(self.log_path, 'ab')
+        if self.log.tell() > valid_length:
+            self.log.truncate(valid_length)
+            self.log.seek(valid_length)
+        self.log_size = valid_length
+        
+    def append(self, record):
+        line = (json.dumps(record, default=encode_task) + "\n").encode()
+        self.log.write(line)
+        self.log_size += len(line)
+        
+    def record_add(self, task):
+        self.append({"op": "add", "task": task})
+        
+    def record_remove(self, task):
+        self.append({"op": "remove", "id": task["id"]})
+        
+    def record_update(self, task, **fields):
+        self.append({"op": "update", "id": task["id"], "fields": fields})
+        
+    def record_clear(self):
+        self.append({"op": "clear"})
+        
+    def save(self, tasks):
+        """Make the appended records durable; tasks is not needed here"""
+        self.log.flush()
+        os.fsync(self.log.fileno())
+        if self.log_size >= self.compact_threshold:
+            self.start_compaction()
+            
+    def start_compaction(self):
+        """Seal the current log and fold it into the snapshot in the background"""
+        if self.compaction is not None and self.compaction.is_alive():
+            return
+        if not os.path.exists(self.sealed_path):
+            self.log.close()
+            os.replace(self.log_path, self.sealed_path)
+            self.open_log()
+        self.compaction = threading.Thread(target=self.compact, daemon=True)
+        self.compaction.start()
+        
+    def compact(self):
+        """Write snapshot + sealed log as the new snapshot (worker thread)
+
+        Only the snapshot and the sealed segment are read here, never the live
+        task list or the active log, so the UI thread can keep appending. If
+        the process dies before the sealed segment is removed, replaying it
+        again on the next start is harmless.
+        """
+        tasks = self.read_snapshot()
+        replay_log(tasks, self.sealed_path)
+        write_json_atomic(self.snapshot_path, list(tasks.values()))
+        os.remove(self.sealed_path)
+        
+    def close(self):
+        if self.log is None:
+            return
+        self.log.flush()
+        os.fsync(self.log.fileno())
+        if self.compaction is not None:
+            self.compaction.join()
+        self.log.close()
+        self.instance_lock.release()
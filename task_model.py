@@ -0,0 +1,101 @@
+import sys
+from operator import attrgetter
+
+from task_index import DUE_PLACEHOLDER, due_ordinal, format_due_date
+
+
+CATEGORIES = ("Work", "Personal", "Shopping", "Health", "Other")
+PRIORITIES = ("High", "Medium", "Low")
+STATUSES = ("Pending", "Completed")
+REPEAT_RULES = ("daily", "weekly", "monthly")
+
+# Fields of a saved task, in file order
+FIELDS = ("id", "task", "category", "priority", "due_date", "due", "status", "repeat")
+
+# Due day numbers are shared between tasks due on the same day
+_days = {}
+
+
+def intern_day(due):
+    return None if due is None else _days.setdefault(due, due)
+
+
+class Task:
+    """One task in memory, a fraction of the size of the same task as a dict
+
+    Slots replace the per-task dict, the repeated category, priority and
+    status strings are interned so every task points at one copy, and the
+    due date is kept as a shared day number whose MM/DD/YYYY text is only
+    made when it is shown. Tasks still read and write like the dicts they
+    replace (task["status"], "due" in task, dict(task)), so the rest of the
+    code and the JSON files don't change.
+    """
+
+    __slots__ = ("id", "task", "category", "priority", "due", "due_text", "status", "repeat")
+
+    def __init__(self, task_id, title, category, priority, due, status, due_text="", repeat=None):
+        self.id = task_id
+        self.task = title
+        self.category = sys.intern(category)
+        self.priority = sys.intern(priority)
+        self.due = intern_day(due)
+        self.due_text = due_text
+        self.status = sys.intern(status)
+        # One of REPEAT_RULES for the latest occurrence of a repeating task, otherwise None
+        self.repeat = None if repeat is None else sys.intern(repeat)
+
+    @classmethod
+    def from_record(cls, record):
+        """Build a task from a saved dict, upgrading files from before due days"""
+        if isinstance(record, Task):
+            # Binary snapshots are read straight into Task objects
+            return record
+        if "due" in record:
+            due = record["due"]
+        else:
+            due = due_ordinal(record["due_date"])
+        # Unparseable legacy text is kept as it was, without a due day
+        due_text = "" if due is not None or record["due_date"] == DUE_PLACEHOLDER else record["due_date"]
+        return cls(record["id"], record["task"], record["category"], record["priority"],
+                   due, record["status"], due_text, record.get("repeat"))
+
+    @property
+    def due_date(self):
+        return format_due_date(self.due) if self.due is not None else self.due_text
+
+    # Dict-style access, straight to the attribute lookup in C
+    __getitem__ = object.__getattribute__
+    __setitem__ = object.__setattr__
+
+    def __contains__(self, field):
+        return field in FIELDS
+
+    def get(self, field, default=None):
+        return getattr(self, field, default) if field in FIELDS else default
+
+    def keys(self):
+        return FIELDS
+
+    def assign(self, other):
+        """Take on another task's fields, keeping this object and its ID"""
+        for field in self.__slots__[1:]:
+            setattr(self, field, getattr(other, field))
+            
+    def to_record(self):
+        """The task as the dict saved in JSON files"""
+        return {"id": self.id, "task": self.task, "category": self.category, "priority": self.priority,
+                "due_date": self.due_date, "due": self.due, "status": self.status, "repeat": self.repeat}
+
+    def __repr__(self):
+        return f"Task({self.to_record()!r})"
+
+
+# Everything saved about a task apart from its ID, for cheap comparisons
+task_state = attrgetter(*Task.__slots__[1:])
+
+
+def encode_task(value):
+    """json.dump default= hook that writes Task objects as their saved dicts"""
+    if isinstance(value, Task):
+        return value.to_record()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
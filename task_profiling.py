@@ -0,0 +1,124 @@
+import cProfile
+import functools
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+
+
+# Environment variable that turns profiling on, like the --profile flag
+PROFILE_ENV = "TASKMASTER_PROFILE"
+
+# Durations kept per timed operation for the rolling percentiles
+TIMING_WINDOW = 500
+
+# Most recent timed calls kept for a trace file
+TRACE_EVENT_LIMIT = 200000
+
+# How often the event loop is probed for lag (ms)
+LAG_PROBE_INTERVAL = 100
+
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of samples, with fraction between 0 and 1"""
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def make_profiler(setting):
+    """A Profiler for a --profile or TASKMASTER_PROFILE value, or None if it is off
+
+    "1" only times operations for the debug panel; any other value is the
+    file written on close, as described in Profiler.
+    """
+    if not setting or setting == "0":
+        return None
+    return Profiler(None if setting == "1" else setting)
+
+
+class Profiler:
+    """Opt-in timings of hot paths and event-loop lag, with an optional dump
+
+    wrap() swaps methods of one object for timed versions, and the last
+    TIMING_WINDOW durations of each feed the rolling p50/p99 from stats().
+    An output path ending in .prof runs the whole session under cProfile and
+    dumps pstats there on close; any other path gets a Chrome trace-event
+    JSON of the timed calls, which chrome://tracing, Perfetto and speedscope
+    show as a flame chart. Timings are only taken on the calling thread.
+    """
+
+    def __init__(self, output=None):
+        self.output = output
+        self.samples = {}
+        self.origin = time.perf_counter()
+        self.trace = None
+        self.profile = None
+        if output and output.endswith(".prof"):
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+        elif output:
+            self.trace = deque(maxlen=TRACE_EVENT_LIMIT)
+
+    def record(self, name, start, end):
+        """Add one duration, given as perf_counter() start and end times"""
+        samples = self.samples.get(name)
+        if samples is None:
+            samples = self.samples[name] = deque(maxlen=TIMING_WINDOW)
+        samples.append(end - start)
+        if self.trace is not None:
+            self.trace.append({
+                "name": name,
+                "ph": "X",
+                "ts": (start - self.origin) * 1e6,
+                "dur": (end - start) * 1e6,
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+            })
+
+    def timed(self, name, function):
+        """function, recording the duration of each call under name"""
+        @functools.wraps(function)
+        def timed_call(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.record(name, start, time.perf_counter())
+        return timed_call
+
+    def wrap(self, target, names):
+        """Time the named methods of target from now on
+
+        Callbacks have to be looked up after this, so wrap before building
+        the widgets that hold them.
+        """
+        for name in names:
+            setattr(target, name, self.timed(name, getattr(target, name)))
+
+    def watch_event_loop(self, root, interval=LAG_PROBE_INTERVAL):
+        """Record how late root.after() callbacks run, as "event loop lag"
+
+        A callback due in interval ms that runs later shows how long the
+        loop was busy with something else, such as a long handler.
+        """
+        def probe(due):
+            now = time.perf_counter()
+            self.record("event loop lag", min(due, now), now)
+            root.after(interval, probe, now + interval / 1000)
+        root.after(interval, probe, time.perf_counter() + interval / 1000)
+
+    def stats(self):
+        """(name, p50, p99, count) for each timed operation, in seconds"""
+        return [(name, percentile(samples, 0.5), percentile(samples, 0.99), len(samples))
+                for name, samples in self.samples.items() if samples]
+
+    def close(self):
+        """Stop profiling and write the output file, if there is one"""
+        if self.profile is not None:
+            self.profile.disable()
+            self.profile.dump_stats(self.output)
+        elif self.trace is not None:
+            with open(self.output, 'w') as file:
+                json.dump({"traceEvents": list(self.trace), "displayTimeUnit": "ms"}, file)
@@ -0,0 +1,191 @@
+import re
+from bisect import bisect_left
+
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+# New tokens scanned unsorted before they are merged into the sorted list
+MAX_UNSORTED_TOKENS = 1000
+
+# Results for query terms this short are cached, holding at most this many
+# IDs per indexed task in all
+SHORT_PREFIX = 2
+CACHED_IDS_PER_TASK = 1
+
+
+def tokenize(text):
+    """Lower-cased words of a task title or search query"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def title_matches(title, query):
+    """Check a single title against a query without touching the index"""
+    tokens = tokenize(title)
+    return all(any(token.startswith(term) for token in tokens) for term in tokenize(query))
+
+
+class SearchIndex:
+    """Inverted index over task titles with sorted runs of its tokens
+
+    Every query term is treated as a prefix, so results narrow as the user
+    types. Tokens are kept in a few sorted runs, where the tokens starting
+    with a prefix are a bisect range. New tokens wait in a small set that
+    is scanned instead; once there are enough, they become a run of their
+    own, merged with the runs before it that are not much longer, so
+    sorting costs O(log n) per token as tasks are added. The posting sets
+    of a term's tokens are then unioned and intersected across terms,
+    smallest first. A token of a single task, such as a number,
+    keeps its task ID bare instead of in a set.
+
+    Terms of up to SHORT_PREFIX characters match a large share of all
+    tokens, so the tasks matching each combination of them are cached and
+    kept up to date as tasks come and go, up to CACHED_IDS_PER_TASK IDs
+    per task in all.
+    """
+
+    def __init__(self):
+        self.postings = {}
+        # Sorted runs of tokens, each at most about half as long as the one before
+        self.runs = []
+        self.new_tokens = set()
+        # Tokens in the runs that have no postings any more
+        self.stale = 0
+        self.task_count = 0
+        # Sorted tuples of short terms -> IDs of the tasks matching all of them
+        self.cached = {}
+        
+    def add(self, task_id, title):
+        tokens = set(tokenize(title))
+        for token in tokens:
+            ids = self.postings.get(token)
+            if ids is None:
+                self.postings[token] = task_id
+                self.new_tokens.add(token)
+                if len(self.new_tokens) > MAX_UNSORTED_TOKENS:
+                    self.merge_new_tokens()
+            elif type(ids) is int:
+                self.postings[token] = {ids, task_id}
+            else:
+                ids.add(task_id)
+        for terms, ids in self.cached.items():
+            if all(any(token.startswith(term) for token in tokens) for term in terms):
+                ids.add(task_id)
+        self.task_count += 1
+            
+    def remove(self, task_id, title):
+        tokens = set(tokenize(title))
+        for token in tokens:
+            ids = self.postings.get(token)
+            if ids is None:
+                continue
+            if type(ids) is not int:
+                ids.discard(task_id)
+                if len(ids) == 1:
+                    self.postings[token] = next(iter(ids))
+            elif ids == task_id:
+                del self.postings[token]
+                if token in self.new_tokens:
+                    self.new_tokens.discard(token)
+                else:
+                    self.stale += 1
+                    if self.stale > sum(map(len, self.runs)) // 2:
+                        self.compact_runs()
+        for ids in self.cached.values():
+            ids.discard(task_id)
+        self.task_count -= 1
+                
+    def clear(self):
+        self.__init__()
+        
+    def posting(self, token):
+        """IDs of the tasks with a token, as a set or a 1-tuple"""
+        ids = self.postings[token]
+        return (ids,) if type(ids) is int else ids
+            
+    def merge_new_tokens(self):
+        """Turn the new tokens into a sorted run, merged with the runs not much longer"""
+        run = sorted(self.new_tokens)
+        self.new_tokens = set()
+        while self.runs and len(self.runs[-1]) <= 2 * len(run):
+            # Two sorted runs, which sorting merges in one pass
+            run = self.runs.pop() + run
+            run.sort()
+        self.runs.append(run)
+        
+    def compact_runs(self):
+        """Rebuild the runs as one, without tokens that were removed or added twice"""
+        self.runs = [sorted({token for run in self.runs for token in run if token in self.postings})]
+        self.stale = 0
+            
+    def tokens_with_prefix(self, prefix):
+        end = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        tokens = [token for run in self.runs for token in run[bisect_left(run, prefix):bisect_left(run, end)]
+                  if token in self.postings]
+        tokens.extend(token for token in self.new_tokens if token.startswith(prefix))
+        # A removed token added again can be in a run twice
+        return list(dict.fromkeys(tokens)) if self.stale else tokens
+    
+    def prefix_union(self, prefix):
+        """IDs of every task with a token starting with prefix"""
+        ids, single = set(), []
+        for token in self.tokens_with_prefix(prefix):
+            posting = self.postings[token]
+            if type(posting) is int:
+                single.append(posting)
+            else:
+                ids |= posting
+        ids.update(single)
+        return ids
+    
+    def short_matches(self, terms):
+        """The cached IDs of the tasks matching every term of a sorted tuple of short terms"""
+        ids = self.cached.pop(terms, None)
+        if ids is None:
+            if len(terms) == 1:
+                ids = self.prefix_union(terms[0])
+            else:
+                ids = set.intersection(*sorted((self.short_matches((term,)) for term in terms), key=len))
+        # Most recently used last; the oldest go once the IDs outgrow the limit
+        self.cached[terms] = ids
+        while len(self.cached) > 1 and \
+                sum(map(len, self.cached.values())) > CACHED_IDS_PER_TASK * self.task_count:
+            del self.cached[next(iter(self.cached))]
+        return ids
+    
+    def search(self, query):
+        """IDs of tasks whose titles contain a word starting with every query term
+
+        Returns None for a query without terms, meaning "no search". The
+        set may belong to the index, so it must not be changed, and is only
+        valid until the next add() or remove().
+        """
+        terms = tokenize(query)
+        if not terms:
+            return None
+        
+        # Cheapest terms first, so the running intersection stays small
+        candidates = []
+        short = tuple(sorted(term for term in set(terms) if len(term) <= SHORT_PREFIX))
+        if short:
+            ids = self.short_matches(short)
+            candidates.append((len(ids), [ids]))
+        for term in set(terms) - set(short):
+            postings = [self.posting(token) for token in self.tokens_with_prefix(term)]
+            candidates.append((sum(map(len, postings)), postings))
+        candidates.sort(key=lambda candidate: candidate[0])
+        
+        results = None
+        for size, postings in candidates:
+            if results is None:
+                results = postings[0] if len(postings) == 1 else set().union(*postings)
+                if type(results) is tuple:
+                    results = set(results)
+            elif len(postings) == 1:
+                results = results.intersection(postings[0])
+            elif size <= len(results) * len(postings):
+                results = results & set().union(*postings)
+            else:
+                results = {task_id for task_id in results if any(task_id in ids for ids in postings)}
+            if not results:
+                break
+        return results
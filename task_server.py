@@ -0,0 +1,545 @@
+"""Local HTTP API over TaskMaster Pro tasks, headless or next to the window
+
+Other tools read and change tasks through here instead of the task file,
+so nothing reads the file halfway through a save:
+
+    python task_server.py --port 8765
+    python To_do_list.py --serve 8765
+
+Endpoints take and return JSON:
+
+    GET    /tasks?filter=active&search=milk&category=Work&priority=High
+                 &order_by=due_date&descending=1&offset=0&limit=100
+    GET    /tasks/<id>
+    POST   /tasks                 one task record, or a list of them
+    DELETE /tasks/<id>
+    POST   /tasks/<id>/toggle
+    GET    /stats
+    GET    /events                server-sent events: added, updated, removed,
+                                  cleared, or reset when the list should be refetched
+"""
+import argparse
+import asyncio
+import json
+import queue
+import socket
+import sys
+import threading
+import time
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from task_index import today_ordinal
+from task_model import encode_task
+from task_storage import STORAGE_BACKENDS, TASKS_FILE, open_storage
+from task_store import SORT_KEYS, STATUS_FILTERS, TaskStore
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Tasks per page of GET /tasks unless limit= asks for another number, up to the maximum
+PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Largest request body accepted, in bytes
+MAX_BODY_SIZE = 16 * 1024 * 1024
+
+# Change events an event-stream client may fall behind by before it is dropped
+FEED_BACKLOG = 1000
+# Idle event streams get a comment this often (s), so proxies keep them open
+FEED_HEARTBEAT = 15
+
+# How often the window runs queued API calls (ms), and for how long at most (s),
+# while calls keep coming; BRIDGE_BUSY_PERIOD (s) after the last one it only
+# looks for new calls every BRIDGE_IDLE_INTERVAL (ms)
+BRIDGE_POLL_INTERVAL = 5
+BRIDGE_POLL_BUDGET = 0.01
+BRIDGE_IDLE_INTERVAL = 100
+BRIDGE_BUSY_PERIOD = 1.0
+
+# Headless saves: after this much idle time, but never held back longer than the maximum (s)
+SAVE_IDLE_DELAY = 0.5
+SAVE_MAX_DELAY = 5.0
+# How often the headless server merges in what other instances saved (s)
+EXTERNAL_POLL_INTERVAL = 1.0
+
+STATUS_TEXT = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found",
+               405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error",
+               501: "Not Implemented"}
+
+encoder = json.JSONEncoder(default=encode_task)
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class TaskApi:
+    """What each endpoint does to a TaskStore, without any HTTP
+
+    Every method must run on the thread that owns the store. Results are
+    plain data, copied out of the store, so they can be encoded on another
+    thread. Each change is passed to on_change as the (added, updated,
+    removed, removed_items) tuple that TaskStore.sync() returns.
+    """
+
+    def __init__(self, store, on_change):
+        self.store = store
+        self.on_change = on_change
+
+    def list_tasks(self, params):
+        """One page of a query, and how many tasks match in all"""
+        filter_type = params.get("filter", "all")
+        if filter_type not in STATUS_FILTERS:
+            raise HttpError(400, f"Unknown filter '{filter_type}'")
+        order_by = params.get("order_by")
+        if order_by not in (None, "id", *SORT_KEYS):
+            raise HttpError(400, f"Cannot order by '{order_by}'")
+        offset = int_param(params, "offset", 0)
+        limit = min(int_param(params, "limit", PAGE_SIZE), MAX_PAGE_SIZE)
+
+        total, tasks = self.store.query_page(offset, limit, filter_type, params.get("search", ""),
+                                             params.get("category"), params.get("priority"), order_by,
+                                             params.get("descending", "") in ("1", "true"))
+        return {"total": total, "offset": offset, "limit": limit,
+                "tasks": [task.to_record() for task in tasks]}
+
+    def get_task(self, task_id):
+        return self.require(task_id).to_record()
+
+    def add_tasks(self, body):
+        """Add one record or a list of them, all or none"""
+        records = body if isinstance(body, list) else [body]
+        if not all(isinstance(record, dict) for record in records):
+            raise HttpError(400, "Expected a task object or a list of them")
+        try:
+            tasks = self.store.add_many(records)
+        except ValueError as e:
+            raise HttpError(400, str(e))
+        self.on_change((tasks, [], [], []))
+        return {"tasks": [task.to_record() for task in tasks]}
+
+    def remove_task(self, task_id):
+        task = self.require(task_id)
+        # The row is found before its link is dropped with the task
+        item = None if self.store.queryable else self.store.index.item_for_task(task_id)
+        self.store.remove(task_id)
+        self.on_change(([], [], [task], [item]))
+        return task.to_record()
+
+    def toggle_task(self, task_id):
+        self.require(task_id)
+        task = self.store.toggle(task_id)
+        self.on_change(([], [task], [], []))
+        return task.to_record()
+
+    def stats(self):
+        return self.store.stats()
+
+    def require(self, task_id):
+        task = self.store.get(task_id)
+        if task is None:
+            raise HttpError(404, f"No task with ID {task_id}")
+        return task
+
+
+def int_param(params, name, default):
+    try:
+        value = int(params.get(name, default))
+    except ValueError:
+        raise HttpError(400, f"{name} must be a number")
+    if value < 0:
+        raise HttpError(400, f"{name} cannot be negative")
+    return value
+
+
+class ChangeFeed:
+    """Fan task changes out to every open event stream
+
+    publish() may be called from any thread: the event is encoded there,
+    once, while the tasks cannot change underneath it, and handed to the
+    server's event loop. A client that falls FEED_BACKLOG events behind is
+    dropped and can reconnect and refetch.
+    """
+
+    def __init__(self):
+        self.loop = None
+        self.subscribers = set()
+
+    def subscribe(self):
+        subscriber = asyncio.Queue()
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        self.subscribers.discard(subscriber)
+
+    def publish(self, kind, tasks=()):
+        """Send an event: records for added and updated tasks, IDs for removed ones"""
+        if self.loop is None or not self.subscribers:
+            return
+        if kind == "removed":
+            data = [task["id"] for task in tasks]
+        else:
+            data = [task.to_record() for task in tasks]
+        message = f"event: {kind}\ndata: {encoder.encode(data)}\n\n".encode()
+        self.loop.call_soon_threadsafe(self.fan_out, message)
+
+    def publish_changes(self, changes):
+        """Send a TaskStore.sync()-style (added, updated, removed, removed_items) tuple"""
+        added, updated, removed, removed_items = changes
+        for kind, tasks in (("added", added), ("updated", updated), ("removed", removed)):
+            if tasks:
+                self.publish(kind, tasks)
+        if not (added or updated or removed):
+            # Queryable backends only report that something changed
+            self.publish("reset")
+
+    def fan_out(self, message):
+        for subscriber in list(self.subscribers):
+            if subscriber.qsize() >= FEED_BACKLOG:
+                self.unsubscribe(subscriber)
+                subscriber.put_nowait(None)
+            else:
+                subscriber.put_nowait(message)
+
+    def close(self):
+        """End every open stream"""
+        for subscriber in list(self.subscribers):
+            self.unsubscribe(subscriber)
+            subscriber.put_nowait(None)
+
+
+class TaskServer:
+    """Minimal HTTP/1.1 server for TaskApi, with keep-alive and an event stream
+
+    call(function) runs function where the store lives and returns an
+    awaitable of its result: right away for a headless store owned by the
+    event loop, or through a TkBridge next to the window.
+    """
+
+    def __init__(self, api, call, feed):
+        self.api = api
+        self.call = call
+        self.feed = feed
+        self.loop = None
+        self.stopping = None
+        # Open connections: their handler tasks, and their writers to close on stop
+        self.connections = {}
+
+    async def serve(self, sock):
+        """Accept connections on a bound socket until stop() is called"""
+        self.loop = asyncio.get_running_loop()
+        self.feed.loop = self.loop
+        self.stopping = asyncio.Event()
+        server = await asyncio.start_server(self.handle_connection, sock=sock, limit=MAX_BODY_SIZE)
+        await self.stopping.wait()
+        server.close()
+        self.feed.close()
+        for writer in self.connections.values():
+            writer.close()
+        # Give handlers a moment to finish before asyncio.run() cancels them
+        if self.connections:
+            await asyncio.wait(self.connections, timeout=1)
+
+    def serve_in_thread(self, sock):
+        """Run the server on its own event loop in a daemon thread"""
+        threading.Thread(target=asyncio.run, args=(self.serve(sock),), daemon=True).start()
+
+    def stop(self):
+        """Stop serving; safe to call from any thread"""
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.stopping.set)
+
+    async def handle_connection(self, reader, writer):
+        self.connections[asyncio.current_task()] = writer
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except asyncio.IncompleteReadError:
+                    break
+                method, target, version, headers = parse_head(head)
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+                url = urlsplit(target)
+
+                if method == "GET" and url.path == "/events":
+                    await self.stream_changes(writer)
+                    break
+
+                try:
+                    body = await read_body(reader, headers)
+                    status, result = await self.dispatch(method, url, body)
+                except HttpError as e:
+                    status, result = e.status, {"error": str(e)}
+                except Exception as e:
+                    status, result = 500, {"error": str(e)}
+                write_response(writer, status, result, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            del self.connections[asyncio.current_task()]
+            writer.close()
+
+    async def dispatch(self, method, url, body):
+        """Route a request to TaskApi; returns the status and the result to encode"""
+        parts = [unquote(part) for part in url.path.strip("/").split("/")]
+        api = self.api
+        if parts == ["stats"] and method == "GET":
+            return 200, await self.call(api.stats)
+        if parts[0] != "tasks" or len(parts) > 3:
+            raise HttpError(404, f"No such endpoint: {url.path}")
+        if len(parts) == 1:
+            if method == "GET":
+                params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+                return 200, await self.call(lambda: api.list_tasks(params))
+            if method == "POST":
+                return 201, await self.call(lambda: api.add_tasks(body))
+            raise HttpError(405, f"{method} is not allowed on /tasks")
+
+        try:
+            task_id = int(parts[1])
+        except ValueError:
+            raise HttpError(404, f"No task with ID {parts[1]}")
+        if len(parts) == 3:
+            if parts[2] != "toggle":
+                raise HttpError(404, f"No such endpoint: {url.path}")
+            if method != "POST":
+                raise HttpError(405, f"{method} is not allowed on {url.path}")
+            return 200, await self.call(lambda: api.toggle_task(task_id))
+        if method == "GET":
+            return 200, await self.call(lambda: api.get_task(task_id))
+        if method == "DELETE":
+            return 200, await self.call(lambda: api.remove_task(task_id))
+        raise HttpError(405, f"{method} is not allowed on {url.path}")
+
+    async def stream_changes(self, writer):
+        """Send change events as they are published, until the client leaves"""
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                     b"Cache-Control: no-cache\r\nConnection: keep-alive\r\n\r\n")
+        subscriber = self.feed.subscribe()
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscriber.get(), FEED_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    message = b": keep-alive\n\n"
+                if message is None:
+                    break
+                writer.write(message)
+                await writer.drain()
+        finally:
+            self.feed.unsubscribe(subscriber)
+
+
+def parse_head(head):
+    """Method, target, version and lower-cased headers of a request head"""
+    lines = head.decode("latin-1").split("\r\n")
+    method, target, version = lines[0].split(" ")
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        if name:
+            headers[name.strip().lower()] = value.strip()
+    return method, target, version, headers
+
+
+async def read_body(reader, headers):
+    """The request's JSON body, or None without one"""
+    if "transfer-encoding" in headers:
+        raise HttpError(501, "Chunked request bodies are not supported")
+    length = int(headers.get("content-length") or 0)
+    if length > MAX_BODY_SIZE:
+        raise HttpError(413, f"Request bodies are limited to {MAX_BODY_SIZE} bytes")
+    if not length:
+        return None
+    try:
+        return json.loads(await reader.readexactly(length))
+    except ValueError:
+        raise HttpError(400, "Request body is not valid JSON")
+
+
+def write_response(writer, status, result, keep_alive):
+    body = encoder.encode(result).encode()
+    writer.write(
+        f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        .encode() + body)
+
+
+def bind(host, port):
+    """A listening socket, bound up front so a busy port is reported to the caller"""
+    return socket.create_server((host, port))
+
+
+class TkBridge:
+    """Run calls from the server's event loop on the Tk thread
+
+    Tk may only be used from its own thread, so coroutines queue functions
+    here and the window runs them from root.after(), a batch at a time,
+    handing each result back to the waiting loop. Only a quick check runs
+    while no calls come: every few milliseconds during a burst of calls,
+    and a few times a second once it has passed. Waking Tk from the loop
+    instead, with event_generate(), would block the loop until Tk answers.
+    Calls wait while ready() is false, such as while tasks are still loading.
+    """
+
+    def __init__(self, root, ready=lambda: True):
+        self.root = root
+        self.ready = ready
+        self.calls = queue.SimpleQueue()
+        # When the loop last queued a call, on the perf_counter() clock
+        self.last_call = float("-inf")
+        root.after(BRIDGE_IDLE_INTERVAL, self.poll)
+
+    def call(self, function):
+        """From the event loop: a future for function's result on the Tk thread"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.last_call = time.perf_counter()
+        self.calls.put((function, future, loop))
+        return future
+
+    def poll(self):
+        deadline = time.perf_counter() + BRIDGE_POLL_BUDGET
+        while self.ready() and time.perf_counter() < deadline:
+            try:
+                function, future, loop = self.calls.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                loop.call_soon_threadsafe(settle, future, function(), None)
+            except Exception as e:
+                loop.call_soon_threadsafe(settle, future, None, e)
+        busy = not self.calls.empty() or time.perf_counter() - self.last_call < BRIDGE_BUSY_PERIOD
+        self.root.after(BRIDGE_POLL_INTERVAL if busy else BRIDGE_IDLE_INTERVAL, self.poll)
+
+
+def settle(future, result, error):
+    # The client may have gone away while the call waited
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+class HeadlessHost:
+    """Owns the store on the event loop thread when there is no window
+
+    Changes are published and saved after a short pause, like the window's
+    write-behind saves, and saves by other instances are merged in and
+    published as they appear, as are new occurrences of repeating tasks.
+    """
+
+    def __init__(self, store, feed):
+        self.store = store
+        self.feed = feed
+        self.save_handle = None
+        self.dirty_since = None
+
+    async def call(self, function):
+        return function()
+
+    def on_change(self, changes):
+        self.feed.publish_changes(changes)
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        if self.dirty_since is None:
+            self.dirty_since = now
+        if self.save_handle is not None:
+            self.save_handle.cancel()
+        delay = 0 if now - self.dirty_since >= SAVE_MAX_DELAY else SAVE_IDLE_DELAY
+        self.save_handle = loop.call_later(delay, self.save)
+
+    def save(self):
+        if self.save_handle is not None:
+            self.save_handle.cancel()
+            self.save_handle = None
+        self.dirty_since = None
+        changes = self.store.save()
+        if changes is not None:
+            self.feed.publish_changes(changes)
+
+    async def poll_external_changes(self):
+        """Poll every EXTERNAL_POLL_INTERVAL seconds until cancelled
+
+        A failed poll is logged and polling goes on; the same error is only
+        logged again once a poll has succeeded in between.
+        """
+        error = None
+        while True:
+            await asyncio.sleep(EXTERNAL_POLL_INTERVAL)
+            try:
+                self.poll()
+            except Exception as e:
+                if str(e) != error:
+                    error = str(e)
+                    print(f"Failed to poll for changes: {error}", file=sys.stderr)
+            else:
+                error = None
+                
+    def poll(self):
+        """Publish what other instances saved and add due occurrences"""
+        changes = self.store.sync()
+        if changes is not None:
+            self.feed.publish_changes(changes)
+        # Only the earliest repeating task is checked each time
+        day = self.store.next_repeat_day()
+        if day is not None and day <= today_ordinal():
+            self.advance_recurrences()
+            
+    def advance_recurrences(self):
+        changes, created = self.store.advance_recurrences()
+        if changes is not None:
+            self.feed.publish_changes(changes)
+        if created:
+            self.feed.publish("added", created)
+
+
+async def serve_headless(store, sock):
+    feed = ChangeFeed()
+    host = HeadlessHost(store, feed)
+    server = TaskServer(TaskApi(store, host.on_change), host.call, feed)
+    poller = asyncio.get_running_loop().create_task(host.poll_external_changes())
+    try:
+        await server.serve(sock)
+    finally:
+        poller.cancel()
+        if host.dirty_since is not None:
+            host.save()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve TaskMaster Pro tasks over local HTTP")
+    parser.add_argument("--storage", choices=STORAGE_BACKENDS, default="json",
+                        help="how tasks are persisted (default: json)")
+    parser.add_argument("--tasks-file", default=TASKS_FILE, help=f"task file (default: {TASKS_FILE})")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"address to listen on (default: {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"port to listen on (default: {DEFAULT_PORT})")
+    args = parser.parse_args(argv)
+
+    store = TaskStore(open_storage(args.storage, args.tasks_file))
+    try:
+        store.load()
+        sock = bind(args.host, args.port)
+    except (RuntimeError, OSError) as e:
+        sys.exit(f"error: {e}")
+    print(f"Serving {len(store)} tasks on http://{args.host}:{args.port}", file=sys.stderr)
+    try:
+        asyncio.run(serve_headless(store, sock))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,365 @@
+import contextlib
+import os
+import sqlite3
+
+from task_index import DUE_PLACEHOLDER, UNDATED, TaskCounters, due_ordinal, next_occurrence
+from task_model import Task
+from task_search import tokenize
+from task_storage import stream_task_file
+from task_store import STATUS_FILTERS
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    task TEXT NOT NULL,
+    category TEXT NOT NULL,
+    priority TEXT NOT NULL,
+    due_date TEXT NOT NULL,
+    status TEXT NOT NULL,
+    priority_rank INTEGER NOT NULL,
+    due_key INTEGER,
+    repeat TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status);
+CREATE INDEX IF NOT EXISTS idx_tasks_category ON tasks (category);
+CREATE INDEX IF NOT EXISTS idx_tasks_priority ON tasks (priority_rank);
+CREATE INDEX IF NOT EXISTS idx_tasks_due ON tasks (due_key);
+CREATE INDEX IF NOT EXISTS idx_tasks_title ON tasks (task COLLATE NOCASE);
+CREATE TABLE IF NOT EXISTS task_tokens (
+    token TEXT NOT NULL,
+    task_id INTEGER NOT NULL,
+    PRIMARY KEY (token, task_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_task_tokens_task ON task_tokens (task_id);
+"""
+
+# Bumped whenever existing databases need a data migration
+SCHEMA_VERSION = 3
+
+# Repeating tasks are few, so only they are indexed by due day; made after
+# the migration that adds the repeat column to older databases
+REPEAT_INDEX = "CREATE INDEX IF NOT EXISTS idx_tasks_repeat ON tasks (due_key) WHERE repeat IS NOT NULL"
+
+COLUMNS = ("id", "task", "category", "priority", "due_date", "status", "repeat")
+
+# Columns written for a new task, in the order of row()
+INSERT_COLUMNS = COLUMNS + ("priority_rank", "due_key")
+
+# Columns read back into task dicts; due_key becomes the task's "due"
+SELECT_COLUMNS = ", ".join(COLUMNS) + ", due_key"
+
+# Sort keys mapped to indexed columns; the id breaks ties
+SORT_COLUMNS = {
+    "id": "id",
+    "task": "task COLLATE NOCASE",
+    "category": "category",
+    "priority": "priority_rank",
+    "due_date": "due_key",
+    "status": "status",
+}
+
+PRIORITY_RANKS = {"High": 0, "Medium": 1, "Low": 2}
+
+# Rows fetched per query while scrolling
+PAGE_SIZE = 200
+
+# IDs bound per statement by batch lookups and changes, within SQLite's variable limit
+ID_CHUNK_SIZE = 500
+
+
+def task_from_row(row):
+    task_id, title, category, priority, due_date, status, repeat, due_key = row
+    due = None if due_key == UNDATED else due_key
+    return Task(task_id, title, category, priority, due, status, due_text="" if due is not None else due_date,
+                repeat=repeat)
+
+
+def id_chunks(task_ids):
+    """Split a list of IDs into (chunk, "?, ?, ...") pairs for IN lists"""
+    for start in range(0, len(task_ids), ID_CHUNK_SIZE):
+        chunk = task_ids[start:start + ID_CHUNK_SIZE]
+        yield chunk, ", ".join("?" * len(chunk))
+
+
+class QueryRows:
+    """Lazy sequence over the result of a task query
+
+    Supports len() and slicing, which is all VirtualTaskList needs, and
+    fetches rows from the database one page at a time as they are shown.
+    """
+
+    def __init__(self, storage, where, params, order):
+        self.storage = storage
+        self.where = where
+        self.params = params
+        self.order = order
+        self.length = storage.connection.execute(
+            f"SELECT COUNT(*) FROM tasks {where}", params).fetchone()[0]
+        self.pages = {}
+        
+    def __len__(self):
+        return self.length
+    
+    def __iter__(self):
+        # One cursor over the whole result: paging with OFFSET would rescan every skipped row
+        cursor = self.storage.connection.execute(
+            f"SELECT {SELECT_COLUMNS} FROM tasks {self.where} ORDER BY {self.order}", self.params)
+        for row in cursor:
+            yield task_from_row(row)
+            
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            if index < 0:
+                index += self.length
+            return self.page(index // PAGE_SIZE)[index % PAGE_SIZE]
+        start, stop, step = index.indices(self.length)
+        rows = []
+        for page_number in range(start // PAGE_SIZE, (stop - 1) // PAGE_SIZE + 1 if stop > start else 0):
+            page_start = page_number * PAGE_SIZE
+            page = self.page(page_number)
+            rows.extend(page[max(start, page_start) - page_start:stop - page_start])
+        return rows[::step]
+    
+    def page(self, page_number):
+        """Fetch one page of rows, caching it for further scrolling"""
+        if page_number not in self.pages:
+            cursor = self.storage.connection.execute(
+                f"SELECT {SELECT_COLUMNS} FROM tasks {self.where} ORDER BY {self.order} LIMIT ? OFFSET ?",
+                self.params + (PAGE_SIZE, page_number * PAGE_SIZE))
+            self.pages[page_number] = [task_from_row(row) for row in cursor]
+        return self.pages[page_number]
+
+
+class SqliteTaskStorage:
+    """Keep tasks in an indexed SQLite database instead of loading them all
+
+    Every mutation is a single statement, or one per chunk of IDs for a
+    batch, and save() commits them. The list and filters ask the database
+    through query() and the dashboard starts from counters(), so only the
+    rows on screen are ever held in memory. The first start imports the
+    plain JSON task file.
+    """
+
+    queryable = True
+
+    def __init__(self, path):
+        self.legacy_path = path
+        self.db_path = os.path.splitext(path)[0] + ".sqlite3"
+        self.connection = None
+        # Changes when another connection commits to the database
+        self.data_version = None
+        
+    def load(self):
+        """Open the database; tasks stay on disk, so nothing is returned"""
+        new_database = not os.path.exists(self.db_path)
+        self.connection = sqlite3.connect(self.db_path)
+        self.connection.executescript(SCHEMA)
+        version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+        if new_database and os.path.exists(self.legacy_path):
+            self.insert_many(stream_task_file(self.legacy_path))
+        elif version < 1:
+            # Databases from before title search have no tokens yet
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO task_tokens VALUES (?, ?)",
+                ((token, task_id) for task_id, title in self.connection.execute("SELECT id, task FROM tasks")
+                 for token in set(tokenize(title))))
+        if version < 2:
+            # Undated tasks sort last under UNDATED, and the placeholder is no date
+            self.connection.execute("UPDATE tasks SET due_key = ? WHERE due_key IS NULL", (UNDATED,))
+            self.connection.execute("UPDATE tasks SET due_date = '' WHERE due_date = ?", (DUE_PLACEHOLDER,))
+        if version < 3 and not new_database:
+            # Repeat rules came after the table did
+            columns = [row[1] for row in self.connection.execute("PRAGMA table_info(tasks)")]
+            if "repeat" not in columns:
+                self.connection.execute("ALTER TABLE tasks ADD COLUMN repeat TEXT")
+        self.connection.execute(REPEAT_INDEX)
+        self.connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.connection.commit()
+        self.data_version = self.connection.execute("PRAGMA data_version").fetchone()[0]
+        return []
+    
+    def insert_many(self, tasks):
+        tasks = list(tasks)
+        self.connection.executemany(
+            f"INSERT INTO tasks ({', '.join(INSERT_COLUMNS)}) VALUES ({', '.join('?' * len(INSERT_COLUMNS))})",
+            (self.row(task) for task in tasks))
+        self.connection.executemany(
+            "INSERT INTO task_tokens VALUES (?, ?)",
+            ((token, task["id"]) for task in tasks for token in set(tokenize(task["task"]))))
+        
+    def row(self, task):
+        due = task["due"] if "due" in task else due_ordinal(task["due_date"])
+        return (
+            task["id"], task["task"], task["category"], task["priority"], task["due_date"], task["status"],
+            task.get("repeat"), PRIORITY_RANKS.get(task["priority"], len(PRIORITY_RANKS)),
+            UNDATED if due is None else due
+        )
+        
+    def get(self, task_id):
+        row = self.connection.execute(
+            f"SELECT {SELECT_COLUMNS} FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        return None if row is None else task_from_row(row)
+    
+    def get_many(self, task_ids):
+        """The tasks with these IDs as a dict by ID, leaving out missing ones"""
+        tasks = {}
+        for chunk, placeholders in id_chunks(list(task_ids)):
+            cursor = self.connection.execute(
+                f"SELECT {SELECT_COLUMNS} FROM tasks WHERE id IN ({placeholders})", chunk)
+            for row in cursor:
+                task = task_from_row(row)
+                tasks[task["id"]] = task
+        return tasks
+    
+    def next_due(self, today):
+        """The pending task with the nearest due day from today on, or None"""
+        row = self.connection.execute(
+            f"SELECT {SELECT_COLUMNS} FROM tasks WHERE status = 'Pending' AND due_key >= ? AND due_key < ? "
+            "ORDER BY due_key, id LIMIT 1", (today, UNDATED)).fetchone()
+        return None if row is None else task_from_row(row)
+    
+    def repeating_before(self, day):
+        """Repeating tasks due before day, earliest first"""
+        cursor = self.connection.execute(
+            f"SELECT {SELECT_COLUMNS} FROM tasks WHERE repeat IS NOT NULL AND due_key < ? ORDER BY due_key, id",
+            (day,))
+        return [task_from_row(row) for row in cursor]
+    
+    def next_repeat_day(self):
+        """Day the earliest next occurrence of a repeating task is due, or None
+
+        Later due days never give an earlier next occurrence under the same
+        rule, so the earliest repeating task of each rule is enough.
+        """
+        rows = self.connection.execute(
+            "SELECT repeat, MIN(due_key) FROM tasks WHERE repeat IS NOT NULL GROUP BY repeat")
+        return min((next_occurrence(due, rule) for rule, due in rows), default=None)
+    
+    def next_id(self):
+        """The ID after the highest one ever stored"""
+        return self.connection.execute("SELECT COALESCE(MAX(id), -1) + 1 FROM tasks").fetchone()[0]
+    
+    def reserve_id(self):
+        """The ID after the highest stored one, read inside a write transaction
+
+        The transaction holds SQLite's write lock until save() commits, so
+        no other connection can store a task under the same ID meanwhile.
+        """
+        if not self.connection.in_transaction:
+            self.connection.execute("BEGIN IMMEDIATE")
+        return self.next_id()
+    
+    def record_add(self, task):
+        self.insert_many([task])
+        
+    def record_remove(self, task):
+        self.connection.execute("DELETE FROM tasks WHERE id = ?", (task["id"],))
+        self.connection.execute("DELETE FROM task_tokens WHERE task_id = ?", (task["id"],))
+        
+    def record_remove_many(self, tasks):
+        for chunk, placeholders in id_chunks([task["id"] for task in tasks]):
+            self.connection.execute(f"DELETE FROM tasks WHERE id IN ({placeholders})", chunk)
+            self.connection.execute(f"DELETE FROM task_tokens WHERE task_id IN ({placeholders})", chunk)
+        
+    def record_update(self, task, **fields):
+        self.record_update_many([task], **fields)
+        
+    def record_update_many(self, tasks, **fields):
+        """Give every task the same new field values"""
+        assignments = ", ".join(f"{column} = ?" for column in fields if column in COLUMNS)
+        values = tuple(fields[column] for column in fields if column in COLUMNS)
+        for chunk, placeholders in id_chunks([task["id"] for task in tasks]):
+            self.connection.execute(f"UPDATE tasks SET {assignments} WHERE id IN ({placeholders})",
+                                    values + tuple(chunk))
+        
+    def record_clear(self):
+        self.connection.execute("DELETE FROM tasks")
+        self.connection.execute("DELETE FROM task_tokens")
+        
+    @contextlib.contextmanager
+    def lock(self):
+        """Keep other connections from writing until the block is done
+
+        Recorded changes already hold SQLite's write lock until save()
+        commits them. Otherwise the block runs in its own immediate
+        transaction, committed at the end, so what it reads cannot change
+        before it writes.
+        """
+        if self.connection.in_transaction:
+            yield
+            return
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self.connection.rollback()
+            raise
+        self.connection.commit()
+    
+    def changed_externally(self):
+        """Whether another connection committed since the last check"""
+        version = self.connection.execute("PRAGMA data_version").fetchone()[0]
+        changed = version != self.data_version
+        self.data_version = version
+        return changed
+    
+    def save(self, tasks):
+        """Commit the recorded changes; tasks is not needed here"""
+        self.connection.commit()
+        
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
+        
+    def query(self, filter_type="all", order_by="id", descending=False, search="", category=None, priority=None,
+              due_range=None):
+        """Tasks matching a list filter, search, category and priority, lazily in sort order
+
+        due_range limits due days to start <= due_key < end, either end open
+        when None. Each search term is a prefix range scan over the
+        task_tokens primary key.
+        """
+        conditions, params = [], []
+        status = STATUS_FILTERS[filter_type]
+        if status:
+            conditions.append("status = ?")
+            params.append(status)
+        if due_range is not None:
+            start, end = due_range
+            conditions.append("due_key >= ? AND due_key < ?")
+            params.extend((-1 if start is None else start, UNDATED if end is None else end))
+        if category is not None:
+            conditions.append("category = ?")
+            params.append(category)
+        if priority is not None:
+            conditions.append("priority_rank = ?")
+            params.append(PRIORITY_RANKS.get(priority, len(PRIORITY_RANKS)))
+        for term in set(tokenize(search)):
+            conditions.append("id IN (SELECT task_id FROM task_tokens WHERE token >= ? AND token < ?)")
+            params.extend((term, term[:-1] + chr(ord(term[-1]) + 1)))
+        where = ("WHERE " + " AND ".join(conditions)) if conditions else ""
+        params = tuple(params)
+        direction = "DESC" if descending else "ASC"
+        order = f"{SORT_COLUMNS[order_by]} {direction}, id {direction}"
+        return QueryRows(self, where, params, order)
+    
+    def counters(self):
+        """Dashboard counters for every stored task, built from grouped index scans
+
+        This runs once at startup; afterwards the app keeps the counters up to
+        date itself as it records each change.
+        """
+        counters = TaskCounters()
+        statuses = dict(self.connection.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status"))
+        counters.total = sum(statuses.values())
+        counters.completed = statuses.get("Completed", 0)
+        counters.categories.update(dict(self.connection.execute(
+            "SELECT category, COUNT(*) FROM tasks GROUP BY category")))
+        counters.priorities.update(dict(self.connection.execute(
+            "SELECT priority, COUNT(*) FROM tasks GROUP BY priority")))
+        counters.pending_due.update(dict(self.connection.execute(
+            "SELECT due_key, COUNT(*) FROM tasks WHERE status != 'Completed' AND due_key < ? GROUP BY due_key",
+            (UNDATED,))))
+        counters.overdue = sum(count for due, count in counters.pending_due.items() if due < counters.today)
+        return counters
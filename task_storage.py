@@ -0,0 +1,379 @@
+import codecs
+import csv
+import json
+import os
+import re
+import tempfile
+
+from task_model import CATEGORIES, encode_task
+
+try:
+    import fcntl
+except ImportError:
+    # Windows locks byte ranges through msvcrt instead
+    fcntl = None
+    import msvcrt
+
+
+# Default task file, next to the application
+TASKS_FILE = "taskmaster_tasks.json"
+
+# Task fields other than the ID, in export column order
+TASK_FIELDS = ("task", "category", "priority", "due_date", "status", "repeat")
+
+# Bytes of a JSON task file read at a time while streaming it
+JSON_CHUNK_SIZE = 1024 * 1024
+# Tasks encoded at a time while writing one
+JSON_WRITE_CHUNK = 10000
+
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+SEPARATOR = re.compile(r"[ \t\n\r]*([,\]])[ \t\n\r]*")
+
+
+def write_json_atomic(path, data):
+    """Write data as JSON to path without ever leaving a half-written file
+
+    Task objects are written as their saved dicts.
+    """
+    write_atomic(path, lambda file: write_json(file, data))
+    
+    
+def write_atomic(path, write, mode='w'):
+    """Call write(file) for a file that replaces path only once it is complete
+
+    The data is written to a temporary file in the same directory, flushed to
+    disk and then renamed over the target, so readers see either the old or
+    the new contents.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix=".tasks-", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, mode) as file:
+            write(file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+class FileLock:
+    """Advisory lock on a file next to the task file, shared by every instance
+
+    Only programs that take the same lock are kept out. Uses flock() on
+    POSIX and msvcrt.locking() on Windows; the lock file itself stays empty.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+        
+    def acquire(self, blocking=True):
+        """Take the lock, waiting for it unless blocking is False
+
+        Returns whether the lock was taken.
+        """
+        file = open(self.path, 'a+b')
+        try:
+            if fcntl is not None:
+                fcntl.flock(file, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            else:
+                file.seek(0)
+                msvcrt.locking(file.fileno(), msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+        except OSError:
+            file.close()
+            if blocking:
+                raise
+            return False
+        self.file = file
+        return True
+    
+    def release(self):
+        if fcntl is None:
+            self.file.seek(0)
+            msvcrt.locking(self.file.fileno(), msvcrt.LK_UNLCK, 1)
+        # Closing the file also drops a flock()
+        self.file.close()
+        self.file = None
+        
+    def __enter__(self):
+        self.acquire()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+def file_signature(path):
+    """What changes when a file is rewritten: inode, size and mtime, or None if it is missing"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+def write_json(file, data):
+    """Write data to an open file as json.dump() would, but faster for task lists
+
+    json.dump() encodes in Python; encoding a list a chunk at a time stays in
+    the C encoder while only holding one chunk's text. Task objects are
+    written as their saved dicts.
+    """
+    encoder = json.JSONEncoder(default=encode_task)
+    if not isinstance(data, list):
+        file.write(encoder.encode(data))
+        return
+    file.write("[")
+    for start in range(0, len(data), JSON_WRITE_CHUNK):
+        if start:
+            file.write(", ")
+        file.write(encoder.encode(data[start:start + JSON_WRITE_CHUNK])[1:-1])
+    file.write("]")
+
+
+def unique_ids(tasks):
+    """Yield tasks with a distinct integer ID each, renumbering duplicates
+
+    Older versions assigned IDs from the list length, so files written by them
+    can contain the same ID more than once. Tasks whose ID is missing or
+    already taken are held back and numbered after the highest ID, once the
+    rest have streamed through.
+    """
+    seen = set()
+    renumber = []
+    for task in tasks:
+        if task.get("id") in seen or not isinstance(task.get("id"), int):
+            renumber.append(task)
+        else:
+            seen.add(task["id"])
+            yield task
+    next_id = max(seen, default=-1) + 1
+    for task in renumber:
+        task["id"] = next_id
+        next_id += 1
+        yield task
+
+
+def iter_json_array(file, chunk_size=JSON_CHUNK_SIZE):
+    """Yield the items of the JSON array in a binary file, one at a time
+
+    The file is read chunk_size bytes at a time and each item is decoded
+    with JSONDecoder.raw_decode once the separator after it has been read,
+    so neither the whole text nor the whole parsed list is ever held in
+    memory. Raises ValueError if the file is not a JSON array.
+    """
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer, position, eof = "", 0, False
+    started = first = False
+    while not eof:
+        chunk = file.read(chunk_size)
+        eof = not chunk
+        buffer = buffer[position:] + text.decode(chunk, final=eof)
+        position = WHITESPACE.match(buffer).end()
+        if not started:
+            if position == len(buffer) and not eof:
+                continue
+            if not buffer.startswith("[", position):
+                raise ValueError("Task file is not a JSON array")
+            position = WHITESPACE.match(buffer, position + 1).end()
+            started = first = True
+            
+        # Decode every item whose following ',' or ']' is already buffered
+        while True:
+            if first and buffer.startswith("]", position):
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                break
+            separator = SEPARATOR.match(buffer, end)
+            if separator is None:
+                if eof:
+                    raise ValueError("Expected ',' or ']' between tasks in the task file")
+                break
+            yield item
+            if separator.group(1) == "]":
+                return
+            position = separator.end()
+            first = False
+            
+            
+def stream_json_tasks(path):
+    """Yield the tasks saved in a JSON file, with unique IDs, without reading it whole"""
+    with open(path, 'rb') as file:
+        yield from unique_ids(iter_json_array(file))
+        
+        
+def stream_task_file(path):
+    """Yield the tasks saved in a task file, telling a binary snapshot from JSON
+
+    Snapshots yield Task objects, JSON files the saved dicts.
+    """
+    from task_binary import is_snapshot, stream_snapshot
+    if is_snapshot(path):
+        yield from stream_snapshot(path)
+    else:
+        yield from stream_json_tasks(path)
+
+
+def parse_task_lines(lines):
+    """Turn pasted or imported text lines into task records
+
+    If the first line is a CSV header with a task column, the lines are read
+    as CSV with those columns. Otherwise each line is one task title, or
+    'title, category, priority, due date' when its second column names a
+    category, so titles containing commas still come through whole.
+    """
+    lines = [line for line in lines if line.strip()]
+    if not lines:
+        return []
+    header = [column.strip().lower().replace(" ", "_") for column in next(csv.reader(lines[:1]))]
+    if "task" in header:
+        return [dict(zip(header, row)) for row in csv.reader(lines[1:])]
+    
+    categories = {category.lower() for category in CATEGORIES}
+    records = []
+    for line in lines:
+        row = next(csv.reader([line]))
+        if len(row) > 1 and row[1].strip().lower() in categories:
+            records.append(dict(zip(TASK_FIELDS, row)))
+        else:
+            records.append({"task": line})
+    return records
+
+
+def read_task_records(path):
+    """Read tasks to import from a JSON array, a CSV file or a plain text list
+
+    .json files hold an array of task objects; anything else goes through
+    parse_task_lines(). Records only hold the fields that were given and
+    never an ID, so imported tasks get fresh IDs and the importer's defaults.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, 'r', newline="") as file:
+        if extension == ".json":
+            records = json.load(file)
+        else:
+            records = parse_task_lines(file)
+    return clean_records(records)
+
+
+def clean_records(records):
+    """Keep the known, non-empty fields of each record, stripped"""
+    records = [{field: str(record[field]).strip() for field in TASK_FIELDS if record.get(field)} for record in records]
+    return [record for record in records if record.get("task")]
+
+
+def write_task_records(file, tasks, extension):
+    """Export tasks to an open file as a JSON array or, for .csv, as CSV"""
+    if extension == ".csv":
+        writer = csv.DictWriter(file, fieldnames=("id",) + TASK_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(tasks)
+    else:
+        write_json(file, list(tasks))
+
+
+class JsonTaskStorage:
+    """Keep all tasks in one JSON array that is rewritten on every save
+
+    Storage backends share this interface: stream() yields the saved tasks
+    one by one as they are read, the record_* methods are called for each
+    mutation, save() persists everything recorded so far and close()
+    releases files on shutdown. Saves happen inside lock(), and
+    changed_externally() tells whether another instance has saved since
+    this one last read or wrote; read_external() reads what it saved
+    without marking it read, for accept_external() to mark once merged.
+    Backends with queryable set are opened with load() instead of
+    streaming every task, and answer list queries themselves.
+
+    Several instances can share one JSON file: each save is made under an
+    advisory lock, and TaskStore merges in what others saved before writing.
+    """
+
+    queryable = False
+
+    def __init__(self, path):
+        self.path = path
+        self.file_lock = FileLock(path + ".lock")
+        # Signature of the file as this instance last read or wrote it
+        self.seen = None
+        
+    def stream(self):
+        """Yield the saved tasks as they are parsed, from JSON or a binary snapshot"""
+        self.seen = file_signature(self.path)
+        if self.seen is not None:
+            yield from stream_task_file(self.path)
+            
+    def lock(self):
+        return self.file_lock
+    
+    def changed_externally(self):
+        """Whether another instance saved the file since this one last read or wrote it"""
+        signature = file_signature(self.path)
+        return signature is not None and signature != self.seen
+    
+    def read_external(self):
+        """Read the file if another instance saved it since this one last read or wrote it
+
+        Returns (seen, signature, records) with the records streamed lazily,
+        or None. Nothing is marked as read, so the records can be parsed on a
+        worker thread while this instance keeps saving.
+        """
+        seen = self.seen
+        signature = file_signature(self.path)
+        if signature is None or signature == seen:
+            return None
+        return seen, signature, stream_task_file(self.path)
+    
+    def accept_external(self, seen, signature):
+        """Mark a read_external() result as read; False if this instance read or wrote the file since"""
+        if self.seen != seen:
+            return False
+        self.seen = signature
+        return True
+        
+    def record_add(self, task):
+        pass
+    
+    def record_remove(self, task):
+        pass
+    
+    def record_update(self, task, **fields):
+        pass
+    
+    def record_clear(self):
+        pass
+    
+    def save(self, tasks):
+        """Rewrite the whole file"""
+        write_json_atomic(self.path, list(tasks))
+        self.seen = file_signature(self.path)
+        
+    def close(self):
+        pass
+
+
+STORAGE_BACKENDS = ("json", "binary", "journal", "sqlite")
+
+
+def open_storage(kind, path):
+    """Create the storage backend named kind for the task file at path"""
+    if kind == "json":
+        return JsonTaskStorage(path)
+    if kind == "binary":
+        from task_binary import BinaryTaskStorage
+        return BinaryTaskStorage(path)
+    if kind == "journal":
+        from task_journal import JournalTaskStorage
+        return JournalTaskStorage(path)
+    if kind == "sqlite":
+        from task_sqlite import SqliteTaskStorage
+        return SqliteTaskStorage(path)
+    raise ValueError(f"Unknown storage backend: {kind}")
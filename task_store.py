@@ -0,0 +1,667 @@
+from itertools import islice
+
+from task_index import (DeadlineIndex, RecurrenceIndex, SortedIndex, TaskCounters, TaskIndex, ViewCache,
+                        catch_up, deadline_key, parse_due_date, today_ordinal)
+from task_model import CATEGORIES, PRIORITIES, REPEAT_RULES, STATUSES, Task, task_state
+from task_search import SearchIndex, title_matches
+
+
+# Saved tasks read, and handed to the UI, per chunk while loading
+LOAD_CHUNK_SIZE = 2000
+
+# Query results kept for reuse: at most this many views, holding this many
+# entries per task in all, so the cache stays about two copies of the list
+VIEW_CACHE_VIEWS = 16
+VIEW_CACHE_ENTRIES_PER_TASK = 2
+
+# Status each list filter selects (None selects every task)
+STATUS_FILTERS = {"all": None, "active": "Pending", "completed": "Completed",
+                  "overdue": "Pending", "week": "Pending"}
+
+# Filters that also take a due-day range, in days from today (None is open)
+DUE_FILTERS = {"overdue": (None, 0), "week": (0, 7)}
+
+# Sort keys of the list columns; "id" order is the task index itself
+SORT_KEYS = {
+    "task": lambda task: task["task"].casefold(),
+    "due_date": deadline_key,
+    "category": lambda task: task["category"],
+    "priority": lambda task: PRIORITIES.index(task["priority"]) if task["priority"] in PRIORITIES else len(PRIORITIES),
+    "status": lambda task: task["status"],
+}
+
+
+def id_order_key(task):
+    # Every task shares this key, so (key, ID) entries are in ID order
+    return 0
+
+
+def normalize_record(record):
+    """Check an imported task record and spell its choices canonically
+
+    Category, priority, status and repeat rule match case-insensitively.
+    Raises ValueError for an empty title, a value that is not one of the
+    known choices or a repeat rule without a due date.
+    """
+    title = str(record.get("task", "")).strip()
+    if not title:
+        raise ValueError("Task cannot be empty")
+    normalized = {"task": title}
+    for field, choices in (("category", CATEGORIES), ("priority", PRIORITIES), ("status", STATUSES),
+                           ("repeat", REPEAT_RULES)):
+        value = str(record.get(field) or "").strip()
+        if value:
+            match = next((choice for choice in choices if choice.lower() == value.lower()), None)
+            if match is None:
+                raise ValueError(f"Unknown {field} '{value}' for task '{title}'")
+            normalized[field] = match
+    if record.get("due_date"):
+        normalized["due_date"] = str(record["due_date"]).strip()
+        parse_due_date(normalized["due_date"])
+    if "repeat" in normalized and parse_due_date(normalized.get("due_date")) is None:
+        raise ValueError(f"Repeating task '{title}' needs a due date")
+    return normalized
+
+
+class TaskStore:
+    """Tasks, their indexes and their storage backend, with no UI attached
+
+    The GUI and the command line both work through these methods. With a
+    queryable backend (SQLite) tasks stay in the database and lookups and
+    queries are answered by it; otherwise tasks live in a TaskIndex.
+    """
+
+    def __init__(self, storage):
+        self.storage = storage
+        self.index = TaskIndex()
+        self.counters = TaskCounters()
+        self.search_index = SearchIndex()
+        self.deadlines = DeadlineIndex()
+        self.recurring = RecurrenceIndex(self.index.get)
+        
+        # Column orderings, built the first time a column is sorted on
+        self.orderings = {}
+        
+        # Recent query results, updated in place as tasks change
+        self.views = ViewCache(VIEW_CACHE_VIEWS, lambda: VIEW_CACHE_ENTRIES_PER_TASK * len(self.index))
+        
+        # Changes made here since the last save win over other instances' saves;
+        # a clear covers every task with an ID below cleared_below
+        self.unsaved = set()
+        self.added = set()
+        self.cleared_below = 0
+        
+    @property
+    def queryable(self):
+        return self.storage.queryable
+    
+    def __len__(self):
+        return self.counters.total
+    
+    def __iter__(self):
+        return iter(self.query())
+    
+    def load(self):
+        """Read and index every saved task, or just open a queryable backend"""
+        if self.queryable:
+            self.storage.load()
+            self.index.next_id = self.storage.next_id()
+            self.counters = self.storage.counters()
+        else:
+            for tasks in self.stream_saved():
+                self.add_loaded(tasks)
+            
+    def read_saved(self):
+        """Read the saved tasks as Task objects without indexing them"""
+        return [task for tasks in self.stream_saved() for task in tasks]
+    
+    def stream_saved(self, chunk_size=LOAD_CHUNK_SIZE):
+        """Yield the saved tasks as lists of Task objects, as they are read
+
+        Safe on a worker thread. Each saved dict becomes a Task as soon as it
+        is parsed, so neither the file text nor a list of every saved dict is
+        ever held in memory at once.
+        """
+        chunk = []
+        for record in self.storage.stream():
+            chunk.append(Task.from_record(record))
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+    
+    def add_loaded(self, tasks):
+        """Index Task objects that are already saved, such as a chunk from stream_saved()"""
+        for task in tasks:
+            self.index.add(task)
+            self.counters.add(task)
+            self.search_index.add(task["id"], task["task"])
+        self.deadlines.add_many(tasks)
+        self.recurring.add_many(tasks)
+        for ordering in self.orderings.values():
+            ordering.add_many(tasks)
+        self.views.add_many(tasks)
+            
+    def add(self, title, category="Work", priority="Medium", due_date="", status="Pending", repeat=None):
+        """Create a task with a fresh ID and return it
+
+        due_date is entered text; it is parsed into the task's "due" day
+        number and raises ValueError if it is not a date. A task with a
+        repeat rule must have one.
+        """
+        due = parse_due_date(due_date)
+        if repeat is not None and due is None:
+            raise ValueError("A repeating task needs a due date")
+        return self.add_new(Task(self.new_id(), title, category, priority, due, status, repeat=repeat))
+    
+    def new_id(self):
+        """A fresh task ID, past every ID handed out here or saved by others
+
+        Queryable backends read the highest stored ID inside their write
+        transaction, which stays open until save(), so two instances adding
+        at once never pick the same ID.
+        """
+        if self.queryable:
+            self.index.next_id = max(self.index.next_id, self.storage.reserve_id())
+        return self.index.new_id()
+    
+    def add_new(self, task):
+        """Index, count and record a Task made with a fresh ID, and return it"""
+        if not self.queryable:
+            self.index.add(task)
+            self.index_fields(task)
+        self.storage.record_add(task)
+        self.counters.add(task)
+        self.unsaved.add(task["id"])
+        self.added.add(task["id"])
+        return task
+    
+    def add_many(self, records):
+        """Add a batch of task records, checking all of them before adding any
+
+        Records are dicts with a "task" title and optionally any other task
+        field. Like every mutation, the batch reaches disk on the next save().
+        """
+        records = [normalize_record(record) for record in records]
+        return [self.add(record.pop("task"), **record) for record in records]
+    
+    def restore(self, tasks):
+        """Put removed Task objects back under their own IDs, such as for undo
+
+        The batch is indexed in one pass and lands back among the other
+        tasks in ID order. Tasks whose ID is in use again are skipped.
+        Returns the tasks restored.
+        """
+        if not self.queryable:
+            tasks = [task for task in tasks if task["id"] not in self.index]
+            self.index.insert(tasks)
+            for task in tasks:
+                self.search_index.add(task["id"], task["task"])
+            self.deadlines.add_many(tasks)
+            self.recurring.add_many(tasks)
+            for ordering in self.orderings.values():
+                ordering.add_many(tasks)
+            self.views.add_many(tasks)
+        for task in tasks:
+            self.storage.record_add(task)
+            self.counters.add(task)
+            self.unsaved.add(task["id"])
+        return tasks
+    
+    def get(self, task_id):
+        """The task with this ID, or None"""
+        if self.queryable:
+            return self.storage.get(task_id)
+        return self.index.get(task_id)
+    
+    def get_many(self, task_ids):
+        """The tasks with these IDs, in that order, skipping IDs that are gone"""
+        task_ids = list(task_ids)
+        tasks = self.storage.get_many(task_ids) if self.queryable else self.index.tasks
+        return [tasks[task_id] for task_id in task_ids if task_id in tasks]
+    
+    def require(self, task_id):
+        task = self.get(task_id)
+        if task is None:
+            raise KeyError(f"No task with ID {task_id}")
+        return task
+    
+    def require_many(self, task_ids):
+        """The tasks with these distinct IDs, fetched in one batch; KeyError if one is missing"""
+        task_ids = list(dict.fromkeys(task_ids))
+        tasks = self.storage.get_many(task_ids) if self.queryable else self.index.tasks
+        for task_id in task_ids:
+            if task_id not in tasks:
+                raise KeyError(f"No task with ID {task_id}")
+        return [tasks[task_id] for task_id in task_ids]
+    
+    def remove(self, task_id):
+        """Delete a task and return it"""
+        task = self.require(task_id)
+        if not self.queryable:
+            self.index.remove(task_id)
+            self.unindex_fields(task)
+        self.storage.record_remove(task)
+        self.counters.remove(task)
+        self.unsaved.add(task_id)
+        return task
+    
+    def remove_many(self, task_ids):
+        """Delete a batch of tasks, all or none, and return them"""
+        tasks = self.require_many(task_ids)
+        if not self.queryable:
+            return [self.remove(task["id"]) for task in tasks]
+        self.storage.record_remove_many(tasks)
+        for task in tasks:
+            self.counters.remove(task)
+            self.unsaved.add(task["id"])
+        return tasks
+    
+    def set_status(self, task_id, status):
+        """Give a task a new status and return it"""
+        task = self.require(task_id)
+        if task["status"] != status:
+            self.counters.remove(task)
+            status_ordering = self.orderings.get("status")
+            if not self.queryable:
+                self.deadlines.remove(task)
+                if status_ordering is not None:
+                    status_ordering.remove(task)
+                self.views.remove(task)
+            task["status"] = status
+            if not self.queryable:
+                self.deadlines.add(task)
+                if status_ordering is not None:
+                    status_ordering.add(task)
+                self.views.add(task)
+            self.counters.add(task)
+            self.storage.record_update(task, status=status)
+            self.unsaved.add(task_id)
+        return task
+    
+    def set_status_many(self, task_ids, status):
+        """Give a batch of tasks a new status, all or none, and return them"""
+        if status not in STATUSES:
+            raise ValueError(f"Unknown status '{status}'")
+        tasks = self.require_many(task_ids)
+        if not self.queryable:
+            return [self.set_status(task["id"], status) for task in tasks]
+        changed = [task for task in tasks if task["status"] != status]
+        for task in changed:
+            self.counters.remove(task)
+            task["status"] = status
+            self.counters.add(task)
+            self.unsaved.add(task["id"])
+        self.storage.record_update_many(changed, status=status)
+        return tasks
+    
+    def toggle(self, task_id):
+        """Flip a task between Pending and Completed"""
+        task = self.require(task_id)
+        return self.set_status(task_id, "Completed" if task["status"] == "Pending" else "Pending")
+    
+    def set_repeat(self, task, repeat):
+        """Give a task a repeat rule, or None for no more occurrences after it"""
+        task["repeat"] = repeat
+        if not self.queryable:
+            self.recurring.add(task)
+        self.storage.record_update(task, repeat=repeat)
+        self.unsaved.add(task["id"])
+        
+    def advance_recurrences(self, today=None):
+        """Create the occurrences repeating tasks need by today and save them
+
+        A repeating task is the latest occurrence of its series. Once the day
+        of the next occurrence comes, that occurrence is added as a new
+        pending task and the rule moves over to it, so future occurrences are
+        never made ahead of time. Days missed while nothing ran are caught up
+        in one batch, skipping to the latest occurrence due by today (see
+        catch_up()).
+
+        Runs under the storage lock after merging what other instances saved,
+        so when several reach the same day only the first creates anything.
+        Returns the sync() result and the tasks created.
+        """
+        today = today_ordinal() if today is None else today
+        with self.storage.lock():
+            changes = self.sync()
+            due = self.storage.repeating_before(today) if self.queryable else self.recurring.due(today)
+            created = []
+            for task in due:
+                rule = task["repeat"]
+                day = catch_up(task["due"], rule, today)
+                if day is not None:
+                    # The rule only moves once its new occurrence exists
+                    created.append(self.add_occurrence(task, day, rule))
+                    self.set_repeat(task, None)
+            if created:
+                self.storage.save(self.index)
+                self.mark_saved()
+        return changes, created
+    
+    def add_occurrence(self, task, due, repeat):
+        """Add a pending copy of a repeating task, due on another day"""
+        return self.add_new(Task(self.new_id(), task["task"], task["category"], task["priority"],
+                                 due, "Pending", repeat=repeat))
+    
+    def next_repeat_day(self):
+        """Day the earliest next occurrence of a repeating task is due, or None"""
+        if self.queryable:
+            return self.storage.next_repeat_day()
+        return self.recurring.next_day()
+        
+    def clear(self):
+        """Delete every task"""
+        self.index.clear()
+        self.search_index.clear()
+        self.deadlines.clear()
+        self.recurring.clear()
+        self.orderings.clear()
+        self.views.clear()
+        self.counters.clear()
+        self.storage.record_clear()
+        self.unsaved.clear()
+        self.added.clear()
+        self.cleared_below = self.index.next_id
+        
+    def index_fields(self, task):
+        """Add a task to the search, deadline, repeat and column indexes and the cached views"""
+        self.search_index.add(task["id"], task["task"])
+        self.deadlines.add(task)
+        self.recurring.add(task)
+        for ordering in self.orderings.values():
+            ordering.add(task)
+        self.views.add(task)
+            
+    def unindex_fields(self, task):
+        """Drop a task from the search, deadline and column indexes and the cached views"""
+        self.search_index.remove(task["id"], task["task"])
+        self.deadlines.remove(task)
+        for ordering in self.orderings.values():
+            ordering.remove(task)
+        self.views.remove(task)
+            
+    def changed_externally(self):
+        """Whether another instance saved since this one last read or wrote
+
+        For file backends only; a queryable backend counts the check as
+        having seen the change, so sync() is asked directly instead.
+        """
+        return self.storage.changed_externally()
+    
+    def read_external(self):
+        """Read and parse what another instance saved, for sync(); None if nothing was
+
+        Safe on a worker thread, which keeps parsing a whole task file off
+        the thread that owns the store. Tasks are only looked up here, to
+        leave out saved ones equal to the saved task held here: if that task
+        changes meanwhile it is unsaved, and its version wins in sync()
+        anyway. Queryable backends have nothing to read and return None.
+        """
+        if self.queryable:
+            return None
+        external = self.storage.read_external()
+        if external is None:
+            return None
+        seen, signature, records = external
+        saved_ids, changed = set(), []
+        for record in records:
+            saved = Task.from_record(record)
+            saved_ids.add(saved["id"])
+            task = self.index.get(saved["id"])
+            if task is None or saved["id"] in self.added or task_state(task) != task_state(saved):
+                changed.append(saved)
+        return seen, signature, saved_ids, changed
+    
+    def sync(self, external=None):
+        """Merge in what another instance saved since this one last read or wrote
+
+        Only saved tasks that differ from the ones held here are applied, and
+        tasks changed here since the last save keep their local version. A
+        clear made here only drops the tasks this instance knew about. Saved
+        IDs never change: when another instance saved a task under an ID also
+        added here, the task added here moves to a fresh ID and keeps its
+        Treeview item, and is reported as updated. Returns None if nothing was
+        saved elsewhere, otherwise (added, updated, removed, removed_items):
+        the tasks concerned and the Treeview items that showed the removed
+        ones. Queryable backends only report that something changed, with
+        every list empty.
+
+        external is a read_external() result from a worker thread; without
+        one the saved tasks are read here. A read made before this instance
+        last saved is dropped, as that save merged in the same tasks or newer.
+        """
+        if self.queryable:
+            if not self.storage.changed_externally():
+                return None
+            self.index.next_id = max(self.index.next_id, self.storage.next_id())
+            self.counters = self.storage.counters()
+            return [], [], [], []
+        
+        if external is None:
+            external = self.read_external()
+        if external is None:
+            return None
+        seen, signature, saved_ids, changed = external
+        if not self.storage.accept_external(seen, signature):
+            return None
+        
+        added, updated, clashes = [], [], []
+        for saved in changed:
+            if saved["id"] < self.cleared_below:
+                continue
+            if saved["id"] in self.added:
+                clashes.append(saved)
+            elif saved["id"] not in self.unsaved:
+                task = self.index.get(saved["id"])
+                if task is None:
+                    added.append(saved)
+                elif task_state(task) != task_state(saved):
+                    updated.append((task, saved))
+                    
+        removed = [task for task in self.index if task["id"] not in saved_ids and task["id"] not in self.unsaved]
+        removed_items = [self.index.item_for_task(task["id"]) for task in removed]
+        for task in removed:
+            self.index.remove(task["id"])
+            self.unindex_fields(task)
+            self.counters.remove(task)
+        for task, saved in updated:
+            self.unindex_fields(task)
+            self.counters.remove(task)
+            task.assign(saved)
+            self.index_fields(task)
+            self.counters.add(task)
+        # Tasks others added can have lower IDs than ones added here
+        self.index.insert(added)
+        for task in added:
+            self.index_fields(task)
+            self.counters.add(task)
+            
+        # IDs are handed out past every saved one before tasks added here move off clashing ones
+        self.index.next_id = max(self.index.next_id, max(saved_ids, default=-1) + 1)
+        renumbered = []
+        for saved in clashes:
+            task = self.index.get(saved["id"])
+            if task is None:
+                continue
+            item_id = self.index.item_for_task(task["id"])
+            self.index.remove(task["id"])
+            self.unindex_fields(task)
+            self.unsaved.discard(task["id"])
+            self.added.discard(task["id"])
+            task["id"] = self.index.new_id()
+            self.index.add(task)
+            if item_id is not None:
+                self.index.link(item_id, task["id"])
+            self.index_fields(task)
+            self.unsaved.add(task["id"])
+            self.added.add(task["id"])
+            renumbered.append(task)
+        self.index.insert(clashes)
+        for task in clashes:
+            self.index_fields(task)
+            self.counters.add(task)
+        return added + clashes, [task for task, saved in updated] + renumbered, removed, removed_items
+    
+    def matches(self, task, filter_type="all", search="", category=None, priority=None):
+        """Check one task against the same criteria query() takes"""
+        status = STATUS_FILTERS[filter_type]
+        if filter_type in DUE_FILTERS:
+            start, end = self.due_range(filter_type)
+            if task["due"] is None or not (start is None or start <= task["due"]) or task["due"] >= end:
+                return False
+        return (status is None or task["status"] == status) and \
+            (category is None or task["category"] == category) and \
+            (priority is None or task["priority"] == priority) and \
+            (not search or title_matches(task["task"], search))
+    
+    def due_range(self, filter_type):
+        """Due-day bounds of a DUE_FILTERS view as of today"""
+        today = today_ordinal()
+        start, end = DUE_FILTERS[filter_type]
+        return (None if start is None else today + start), (None if end is None else today + end)
+    
+    def query(self, filter_type="all", search="", category=None, priority=None, order_by=None, descending=False):
+        """Tasks matching a status filter, title search, category and priority
+
+        Returns a list, or a lazy sequence for queryable backends, ordered
+        by order_by: "id", "due_date" or a SORT_KEYS column. Due views
+        default to deadline order, everything else to task order. The full
+        list is read off the task index or a maintained ordering; filtered
+        results are kept in the view cache and updated as tasks change, so
+        asking again only copies them.
+        """
+        if order_by is None:
+            order_by = "due_date" if filter_type in DUE_FILTERS else "id"
+        if self.queryable:
+            return self.storage.query(filter_type, order_by, descending, search=search, category=category,
+                                      priority=priority, due_range=self.due_range(filter_type)
+                                      if filter_type in DUE_FILTERS else None)
+        
+        if STATUS_FILTERS[filter_type] is None and not search and category is None and priority is None:
+            tasks = list(self.index) if order_by == "id" else self.ordering(order_by).tasks()
+        else:
+            # Due views move with the date, so today is part of their key
+            key = (filter_type, category, priority, search, order_by,
+                   today_ordinal() if filter_type in DUE_FILTERS else None)
+            view = self.views.get(key)
+            if view is None:
+                view = self.views.put(key, lambda task: self.matches(task, filter_type, search, category, priority),
+                                      SORT_KEYS.get(order_by, id_order_key),
+                                      self.find_tasks(filter_type, search, category, priority, order_by))
+            tasks = view.tasks()
+        if descending:
+            tasks.reverse()
+        return tasks
+    
+    def find_tasks(self, filter_type, search, category, priority, order_by):
+        """Compute a query() result from the indexes, in ascending order
+
+        Due views and searches only walk the tasks the deadline or search
+        index returns; other views filter a maintained ordering, so sorting
+        never compares every task.
+        """
+        hits = self.search_index.search(search)
+        status = STATUS_FILTERS[filter_type]
+        if filter_type in DUE_FILTERS:
+            tasks = self.deadlines.tasks(status, *self.due_range(filter_type))
+            if hits is not None:
+                tasks = [task for task in tasks if task["id"] in hits]
+            tasks = self.sorted_tasks(tasks, order_by)
+        elif hits is not None:
+            tasks = self.sorted_tasks(map(self.index.get, hits), order_by)
+        elif order_by == "id":
+            tasks = self.index
+        elif order_by == "due_date" and status is not None:
+            tasks = self.deadlines.tasks(status)
+        else:
+            tasks = self.ordering(order_by).tasks()
+        return [
+            task for task in tasks
+            if (status is None or task["status"] == status) and
+               (category is None or task["category"] == category) and
+               (priority is None or task["priority"] == priority)
+        ]
+    
+    def query_page(self, offset, limit, filter_type="all", search="", category=None, priority=None,
+                   order_by=None, descending=False):
+        """One page of query() results, and how many results there are in all
+
+        Plain status views in ID order are read off the task index and
+        counted by the counters, so a page costs O(offset + limit) instead of
+        a pass over every task. Everything else pages through query().
+        """
+        if self.queryable or search or category or priority or filter_type in DUE_FILTERS or \
+                order_by not in (None, "id"):
+            tasks = self.query(filter_type, search, category, priority, order_by, descending)
+            return len(tasks), tasks[offset:offset + limit]
+        
+        status = STATUS_FILTERS[filter_type]
+        tasks = reversed(self.index) if descending else iter(self.index)
+        if status is None:
+            total = self.counters.total
+        else:
+            tasks = (task for task in tasks if task["status"] == status)
+            total = self.counters.completed if status == "Completed" else self.counters.total - self.counters.completed
+        return total, list(islice(tasks, offset, offset + limit))
+    
+    def sorted_tasks(self, tasks, order_by):
+        """A small candidate set of tasks, in the order the orderings would give"""
+        tasks = list(tasks)
+        key = SORT_KEYS.get(order_by)
+        tasks.sort(key=lambda task: (task["id"] if key is None else (key(task), task["id"])))
+        return tasks
+    
+    def ordering(self, column):
+        """The maintained SortedIndex for a column, built on first use"""
+        if column not in self.orderings:
+            ordering = SortedIndex(SORT_KEYS[column])
+            ordering.add_many(self.index)
+            self.orderings[column] = ordering
+        return self.orderings[column]
+    
+    def next_due(self, start=None):
+        """The pending task with the nearest due date from day start (today by default) on, or None"""
+        start = today_ordinal() if start is None else start
+        if self.queryable:
+            return self.storage.next_due(start)
+        return self.deadlines.first("Pending", start)
+    
+    def pending_due(self, start, end):
+        """Pending tasks due on days start <= due < end, start open when None, in deadline order"""
+        if self.queryable:
+            return self.storage.query("active", "due_date", due_range=(start, end))
+        return self.deadlines.tasks("Pending", start, end)
+    
+    def stats(self):
+        """Dashboard numbers as a plain dict"""
+        counters = self.counters
+        return {
+            "total": counters.total,
+            "completed": counters.completed,
+            "pending": counters.total - counters.completed,
+            "overdue": counters.overdue_count(),
+            "categories": dict(counters.categories),
+            "priorities": dict(counters.priorities),
+        }
+    
+    def save(self):
+        """Persist every change, first merging in what other instances saved
+
+        Returns the sync() result, so a view can show the merged changes.
+        """
+        with self.storage.lock():
+            changes = self.sync()
+            self.storage.save(self.index)
+        self.mark_saved()
+        return changes
+    
+    def mark_saved(self):
+        """Forget which changes were made here, once they are saved"""
+        self.unsaved.clear()
+        self.added.clear()
+        self.cleared_below = 0
+        
+    def close(self):
+        self.storage.close()
@@ -0,0 +1,64 @@
+import os
+import tempfile
+import unittest
+
+from task_binary import is_snapshot, stream_snapshot, write_snapshot
+from task_model import Task
+
+
+def fields(task):
+    return dict(task) | {"due_text": task.due_text}
+
+
+class SnapshotTest(unittest.TestCase):
+    """Writing tasks as a binary snapshot and streaming them back"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "tasks.json")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def round_trip(self, tasks):
+        with open(self.path, 'wb') as file:
+            write_snapshot(file, tasks)
+        return list(stream_snapshot(self.path))
+
+    def test_round_trip(self):
+        tasks = [
+            Task(0, "Plain title", "Work", "High", 738000, "Pending"),
+            Task(7, "Café ☕ and 🎉 emoji", "Personal", "Low", None, "Completed"),
+            Task(3, "", "Other", "Medium", None, "Pending", due_text="next tuesday"),
+            Task(2**40, "Water plants", "Health", "Low", 738100, "Pending", repeat="weekly"),
+            Task(9, "Lone surrogate \udc80 kept", "Shopping", "High", 1, "Pending"),
+        ]
+        read = self.round_trip(tasks)
+        self.assertTrue(is_snapshot(self.path))
+        self.assertEqual([fields(task) for task in read], [fields(task) for task in tasks])
+
+    def test_empty_snapshot(self):
+        self.assertEqual(self.round_trip([]), [])
+        self.assertTrue(is_snapshot(self.path))
+
+    def test_json_is_not_a_snapshot(self):
+        with open(self.path, 'w') as file:
+            file.write("[]")
+        self.assertFalse(is_snapshot(self.path))
+
+    def test_too_many_coded_values(self):
+        tasks = [Task(i, "Task", f"Category {i}", "Low", None, "Pending") for i in range(257)]
+        with open(self.path, 'wb') as file, self.assertRaises(ValueError):
+            write_snapshot(file, tasks)
+
+    def test_other_version_is_refused(self):
+        self.round_trip([Task(1, "Task", "Work", "Low", None, "Pending")])
+        with open(self.path, 'r+b') as file:
+            file.seek(8)
+            file.write(b"\x02")
+        with self.assertRaises(ValueError):
+            list(stream_snapshot(self.path))
+
+
+if __name__ == "__main__":
+    unittest.main()
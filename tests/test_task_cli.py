@@ -0,0 +1,112 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+
+import task_cli
+from task_journal import JournalTaskStorage
+
+
+class TaskCliTest(unittest.TestCase):
+    """Batch commands run against a task file in a temporary directory"""
+
+    backend = "json"
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.tasks_file = os.path.join(self.directory.name, "tasks.json")
+        self.run_cli("import", self.write("import.csv", "task,category,priority\n"
+                                                        "Buy milk,Shopping,Low\n"
+                                                        "Write report,Work,High\n"
+                                                        "Buy stamps,Shopping,Medium\n"))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, name, text):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w') as file:
+            file.write(text)
+        return path
+
+    def run_cli(self, *argv):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output), contextlib.redirect_stderr(io.StringIO()):
+            task_cli.main(["--storage", self.backend, "--tasks-file", self.tasks_file, *argv])
+        return output.getvalue()
+
+    def exported(self, *selectors):
+        return json.loads(self.run_cli("export", "-", *selectors))
+
+    def test_import_and_export(self):
+        tasks = self.exported()
+        self.assertEqual([task["task"] for task in tasks], ["Buy milk", "Write report", "Buy stamps"])
+        self.assertEqual(len({task["id"] for task in tasks}), 3)
+        self.assertEqual([task["task"] for task in self.exported("--search", "buy")],
+                         ["Buy milk", "Buy stamps"])
+
+    def test_export_to_csv(self):
+        path = os.path.join(self.directory.name, "out.csv")
+        self.run_cli("export", path, "--priority", "High")
+        with open(path) as file:
+            lines = file.read().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertIn("Write report", lines[1])
+
+    def test_complete_and_reopen(self):
+        self.assertIn("Marked 2 tasks as Completed", self.run_cli("complete", "--category", "Shopping"))
+        self.assertEqual([task["task"] for task in self.exported("--status", "completed")],
+                         ["Buy milk", "Buy stamps"])
+        milk = self.exported("--search", "milk")[0]
+        self.run_cli("reopen", "--ids", str(milk["id"]))
+        self.assertEqual([task["task"] for task in self.exported("--status", "completed")], ["Buy stamps"])
+
+    def test_remove(self):
+        ids = [task["id"] for task in self.exported("--category", "Shopping")]
+        self.assertIn("Removed 2 tasks", self.run_cli("remove", "--ids", ",".join(map(str, ids))))
+        self.assertEqual([task["task"] for task in self.exported()], ["Write report"])
+
+    def test_stats(self):
+        self.run_cli("complete", "--priority", "Low")
+        stats = json.loads(self.run_cli("stats"))
+        self.assertEqual((stats["total"], stats["completed"], stats["pending"]), (3, 1, 2))
+        self.assertEqual(stats["categories"], {"Shopping": 2, "Work": 1})
+
+    def test_file_errors_exit_with_one_line(self):
+        missing = os.path.join(self.directory.name, "missing", "tasks.csv")
+        for argv in (("import", missing), ("export", missing)):
+            with self.subTest(argv=argv), self.assertRaises(SystemExit) as raised:
+                self.run_cli(*argv)
+            self.assertRegex(str(raised.exception.code), r"^error: .*missing")
+            self.assertNotIn("\n", raised.exception.code)
+
+    def test_unopenable_task_file(self):
+        # Under a file instead of a directory
+        self.tasks_file = os.path.join(self.write("not_a_directory", ""), "tasks.json")
+        with self.assertRaises(SystemExit) as raised:
+            self.run_cli("stats")
+        self.assertTrue(str(raised.exception.code).startswith("error: "))
+
+
+class SqliteTaskCliTest(TaskCliTest):
+    backend = "sqlite"
+
+
+class JournalTaskCliTest(TaskCliTest):
+    backend = "journal"
+
+    def test_open_journal_is_reported(self):
+        journal = JournalTaskStorage(self.tasks_file)
+        journal.load()
+        try:
+            with self.assertRaises(SystemExit) as raised:
+                self.run_cli("stats")
+            self.assertIn("already open", str(raised.exception.code))
+        finally:
+            journal.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+
+from task_history import UndoHistory
+
+
+class UndoHistoryTest(unittest.TestCase):
+    """Bounded undo and redo stacks"""
+
+    def test_undo_and_redo_move_steps_between_stacks(self):
+        history = UndoHistory()
+        history.record("add", ["first"])
+        history.record("status", ["first"], "Completed", ["Pending"])
+        step = history.undo()
+        self.assertEqual((step.kind, step.status, step.previous), ("status", "Completed", ["Pending"]))
+        self.assertTrue(history.can_redo)
+        self.assertIs(history.redo(), step)
+        self.assertFalse(history.can_redo)
+
+    def test_empty_stacks(self):
+        history = UndoHistory()
+        self.assertFalse(history.can_undo)
+        self.assertIsNone(history.undo())
+        self.assertIsNone(history.redo())
+
+    def test_oldest_steps_are_dropped_past_the_limit(self):
+        history = UndoHistory(limit=3)
+        for number in range(5):
+            history.record("add", [number])
+        undone = []
+        while history.can_undo:
+            undone.append(history.undo().tasks)
+        self.assertEqual(undone, [[4], [3], [2]])
+        self.assertEqual([history.redo().tasks for _ in range(3)], [[2], [3], [4]])
+        self.assertIsNone(history.redo())
+
+    def test_new_change_clears_redo(self):
+        history = UndoHistory()
+        history.record("add", ["first"])
+        history.undo()
+        history.record("remove", ["second"])
+        self.assertFalse(history.can_redo)
+        self.assertEqual(history.undo().kind, "remove")
+        self.assertIsNone(history.undo())
+
+
+if __name__ == "__main__":
+    unittest.main()
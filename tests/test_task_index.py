@@ -0,0 +1,43 @@
+import datetime
+import unittest
+
+from task_index import catch_up, next_occurrence
+
+
+def day(year, month, date):
+    return datetime.date(year, month, date).toordinal()
+
+
+class RecurrenceTest(unittest.TestCase):
+    """Next occurrences of daily, weekly and monthly tasks"""
+
+    def test_daily_and_weekly(self):
+        self.assertEqual(next_occurrence(day(2024, 12, 31), "daily"), day(2025, 1, 1))
+        self.assertEqual(next_occurrence(day(2024, 2, 26), "weekly"), day(2024, 3, 4))
+
+    def test_monthly_keeps_the_day_of_the_month(self):
+        self.assertEqual(next_occurrence(day(2024, 1, 15), "monthly"), day(2024, 2, 15))
+        self.assertEqual(next_occurrence(day(2024, 12, 15), "monthly"), day(2025, 1, 15))
+
+    def test_monthly_falls_back_to_the_last_day(self):
+        self.assertEqual(next_occurrence(day(2024, 1, 31), "monthly"), day(2024, 2, 29))
+        self.assertEqual(next_occurrence(day(2023, 1, 31), "monthly"), day(2023, 2, 28))
+        self.assertEqual(next_occurrence(day(2024, 3, 31), "monthly"), day(2024, 4, 30))
+        # The series carries on from the shortened day
+        self.assertEqual(next_occurrence(day(2024, 2, 29), "monthly"), day(2024, 3, 29))
+
+    def test_catch_up_before_the_next_occurrence(self):
+        self.assertIsNone(catch_up(day(2024, 5, 1), "weekly", day(2024, 5, 7)))
+        self.assertIsNone(catch_up(day(2024, 5, 1), "daily", day(2024, 5, 1)))
+
+    def test_catch_up_on_the_day(self):
+        self.assertEqual(catch_up(day(2024, 5, 1), "weekly", day(2024, 5, 8)), day(2024, 5, 8))
+
+    def test_catch_up_skips_to_the_latest_occurrence(self):
+        self.assertEqual(catch_up(day(2024, 5, 1), "daily", day(2024, 9, 30)), day(2024, 9, 30))
+        self.assertEqual(catch_up(day(2024, 5, 1), "weekly", day(2024, 5, 30)), day(2024, 5, 29))
+        self.assertEqual(catch_up(day(2024, 1, 31), "monthly", day(2024, 6, 15)), day(2024, 5, 29))
+
+
+if __name__ == "__main__":
+    unittest.main()
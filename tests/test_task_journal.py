@@ -0,0 +1,125 @@
+import json
+import os
+import tempfile
+import unittest
+
+from task_journal import JournalTaskStorage, replay_log
+from task_storage import write_json_atomic
+
+
+def task(task_id, title, status="Pending"):
+    return {"id": task_id, "task": title, "category": "Work", "priority": "Low",
+            "due_date": "", "status": status}
+
+
+class JournalTest(unittest.TestCase):
+    """Replaying the operation log and folding it into a snapshot"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "tasks.json")
+        self.journal = None
+
+    def tearDown(self):
+        self.close_journal()
+        self.directory.cleanup()
+
+    def open_journal(self, **options):
+        self.close_journal()
+        self.journal = JournalTaskStorage(self.path, **options)
+        return self.journal, {saved["id"]: saved for saved in self.journal.load()}
+
+    def close_journal(self):
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+
+    def test_operations_are_replayed(self):
+        journal, tasks = self.open_journal()
+        first, second = task(1, "First"), task(2, "Second")
+        journal.record_add(first)
+        journal.record_add(second)
+        journal.record_update(first, status="Completed")
+        journal.record_remove(second)
+        journal.save(None)
+        self.close_journal()
+
+        journal, tasks = self.open_journal()
+        self.assertEqual(tasks, {1: task(1, "First", "Completed")})
+
+    def test_clear_is_replayed(self):
+        journal, tasks = self.open_journal()
+        journal.record_add(task(1, "First"))
+        journal.record_clear()
+        journal.record_add(task(2, "Second"))
+        self.close_journal()
+
+        journal, tasks = self.open_journal()
+        self.assertEqual(list(tasks), [2])
+
+    def test_torn_last_record_is_dropped(self):
+        journal, tasks = self.open_journal()
+        journal.record_add(task(1, "First"))
+        self.close_journal()
+        with open(journal.log_path, 'ab') as log:
+            log.write(b'{"op": "add", "task": {"id": 2')
+
+        journal, tasks = self.open_journal()
+        self.assertEqual(list(tasks), [1])
+        self.assertEqual(os.path.getsize(journal.log_path), journal.log_size)
+        journal.record_add(task(3, "Third"))
+        self.close_journal()
+
+        journal, tasks = self.open_journal()
+        self.assertEqual(list(tasks), [1, 3])
+
+    def test_replay_is_idempotent(self):
+        log_path = os.path.join(self.directory.name, "log.jsonl")
+        with open(log_path, 'w') as log:
+            for record in ({"op": "add", "task": task(1, "First")},
+                           {"op": "update", "id": 1, "fields": {"task": "Renamed"}},
+                           {"op": "remove", "id": 5}):
+                log.write(json.dumps(record) + "\n")
+        tasks = {}
+        length = replay_log(tasks, log_path)
+        self.assertEqual(replay_log(tasks, log_path), length)
+        self.assertEqual(tasks, {1: task(1, "Renamed")})
+
+    def test_compaction_folds_the_log_into_the_snapshot(self):
+        journal, tasks = self.open_journal(compact_threshold=1)
+        journal.record_add(task(1, "First"))
+        journal.save(None)
+        journal.record_add(task(2, "Second"))
+        self.close_journal()
+
+        self.assertFalse(os.path.exists(journal.sealed_path))
+        with open(journal.snapshot_path) as snapshot:
+            self.assertEqual([saved["id"] for saved in json.load(snapshot)], [1])
+        journal, tasks = self.open_journal()
+        self.assertEqual(list(tasks), [1, 2])
+
+    def test_interrupted_compaction_is_finished(self):
+        journal, tasks = self.open_journal()
+        journal.record_add(task(1, "First"))
+        self.close_journal()
+        os.replace(journal.log_path, journal.sealed_path)
+
+        journal, tasks = self.open_journal()
+        self.assertEqual(list(tasks), [1])
+        journal.compaction.join()
+        self.assertFalse(os.path.exists(journal.sealed_path))
+
+    def test_legacy_file_is_migrated(self):
+        write_json_atomic(self.path, [task(4, "Old")])
+        journal, tasks = self.open_journal()
+        self.assertEqual(tasks, {4: task(4, "Old")})
+        self.assertTrue(os.path.exists(journal.snapshot_path))
+
+    def test_second_instance_is_refused(self):
+        self.open_journal()
+        with self.assertRaises(RuntimeError):
+            JournalTaskStorage(self.path).load()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import random
+import unittest
+
+from task_search import MAX_UNSORTED_TOKENS, SearchIndex, title_matches
+
+
+class SearchIndexTest(unittest.TestCase):
+    """Prefix search over task titles as tasks come and go"""
+
+    def setUp(self):
+        self.index = SearchIndex()
+        self.titles = {}
+
+    def add(self, task_id, title):
+        self.index.add(task_id, title)
+        self.titles[task_id] = title
+
+    def remove(self, task_id):
+        self.index.remove(task_id, self.titles.pop(task_id))
+
+    def expected(self, query):
+        return {task_id for task_id, title in self.titles.items() if title_matches(title, query)}
+
+    def test_prefix_search(self):
+        self.add(1, "Buy milk")
+        self.add(2, "Build shed")
+        self.add(3, "Call Bob about the milkshake")
+        self.assertEqual(self.index.search("bu"), {1, 2})
+        self.assertEqual(self.index.search("milk"), {1, 3})
+        self.assertEqual(self.index.search("MILK bu"), {1})
+        self.assertEqual(self.index.search("shed"), {2})
+        self.assertEqual(self.index.search("zebra"), set())
+
+    def test_query_without_terms(self):
+        self.add(1, "Buy milk")
+        self.assertIsNone(self.index.search(""))
+        self.assertIsNone(self.index.search(" -- "))
+
+    def test_removed_tasks_stop_matching(self):
+        self.add(1, "Buy milk")
+        self.add(2, "Buy bread")
+        self.assertEqual(self.index.search("b"), {1, 2})
+        self.remove(1)
+        self.assertEqual(self.index.search("b"), {2})
+        self.assertEqual(self.index.search("milk"), set())
+        self.add(1, "Sell milk")
+        self.assertEqual(self.index.search("b"), {2})
+        self.assertEqual(self.index.search("milk"), {1})
+
+    def test_clear(self):
+        self.add(1, "Buy milk")
+        self.index.search("b")
+        self.index.clear()
+        self.assertEqual(self.index.search("b"), set())
+
+    def test_matches_title_matches_through_sorted_runs(self):
+        # Enough distinct tokens to be merged into several sorted runs
+        rng = random.Random(7)
+        words = ["".join(rng.choice("abcdef") for _ in range(rng.randint(1, 6)))
+                 for _ in range(3 * MAX_UNSORTED_TOKENS)]
+        queries = ["a", "b c", "ab", "abc", "fe d", "cafe", "f", "dd ee", "a a"]
+        for task_id in range(4000):
+            self.add(task_id, " ".join(rng.sample(words, 3)) + f" {task_id}")
+            if task_id % 3 == 0:
+                self.remove(rng.choice(list(self.titles)))
+            if task_id % 500 == 0:
+                for query in queries:
+                    self.assertEqual(self.index.search(query), self.expected(query), query)
+        for query in queries + ["12", "399"]:
+            self.assertEqual(self.index.search(query), self.expected(query), query)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import asyncio
+import contextlib
+import io
+import unittest
+from unittest import mock
+
+import task_server
+from task_server import ChangeFeed, HeadlessHost
+
+
+class HeadlessPollTest(unittest.TestCase):
+    """The headless host's poll loop outliving errors"""
+
+    def run_polls(self, store, count):
+        host = HeadlessHost(store, ChangeFeed())
+
+        async def poll():
+            poller = asyncio.get_running_loop().create_task(host.poll_external_changes())
+            while store.sync.call_count < count:
+                await asyncio.sleep(0)
+            poller.cancel()
+
+        log = io.StringIO()
+        with mock.patch.object(task_server, "EXTERNAL_POLL_INTERVAL", 0), contextlib.redirect_stderr(log):
+            asyncio.run(asyncio.wait_for(poll(), 5))
+        return log.getvalue().splitlines()
+
+    def test_polling_goes_on_after_an_error(self):
+        store = mock.Mock()
+        store.sync.side_effect = [OSError("disk gone"), OSError("disk gone"), None,
+                                  OSError("disk gone"), None, None]
+        store.next_repeat_day.return_value = None
+        log = self.run_polls(store, 6)
+        self.assertEqual(log, ["Failed to poll for changes: disk gone"] * 2)
+
+    def test_recurrence_errors_are_logged(self):
+        store = mock.Mock()
+        store.sync.return_value = None
+        store.next_repeat_day.return_value = 0
+        store.advance_recurrences.side_effect = RuntimeError("locked")
+        log = self.run_polls(store, 3)
+        self.assertEqual(log, ["Failed to poll for changes: locked"])
+        self.assertEqual(store.advance_recurrences.call_count, store.sync.call_count)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import io
+import json
+import unittest
+
+from task_storage import iter_json_array
+
+
+# Separators, brackets and escapes inside strings, multi-byte characters,
+# nesting and odd whitespace, so chunks split at every awkward place
+TASKS = [
+    {"id": 1, "task": "Buy milk, eggs ] and [bread]", "status": "Pending"},
+    {"id": 2, "task": "Café ☕ — naïve 🎉", "status": "Completed"},
+    {"id": 3, "task": "Quote \" and backslash \\ and \\u0041", "tags": [[], {"a": [1, 2]}]},
+    {"id": 4, "task": "", "due": None, "repeat": "weekly"},
+]
+
+
+def parse(text, chunk_size):
+    return list(iter_json_array(io.BytesIO(text.encode("utf-8")), chunk_size))
+
+
+class IterJsonArrayTest(unittest.TestCase):
+    """Streaming a JSON array across chunk boundaries"""
+
+    def test_every_chunk_size_gives_the_same_items(self):
+        texts = (json.dumps(TASKS), json.dumps(TASKS, ensure_ascii=False),
+                 json.dumps(TASKS, ensure_ascii=False, indent=3) + "\n\n",
+                 "\ufeff" + json.dumps(TASKS, ensure_ascii=False))
+        for text in texts:
+            for chunk_size in range(1, 40):
+                with self.subTest(text=text[:20], chunk_size=chunk_size):
+                    self.assertEqual(parse(text, chunk_size), TASKS)
+
+    def test_empty_arrays(self):
+        for text in ("[]", " [ \n ] ", "\n[]\n"):
+            for chunk_size in (1, 2, 1024):
+                self.assertEqual(parse(text, chunk_size), [])
+
+    def test_numbers_are_not_cut_at_a_boundary(self):
+        for chunk_size in range(1, 8):
+            self.assertEqual(parse("[12345, 678, -9.5e3]", chunk_size), [12345, 678, -9.5e3])
+
+    def test_not_an_array(self):
+        for text in ('{"id": 1}', "", "   "):
+            with self.assertRaises(ValueError):
+                parse(text, 3)
+
+    def test_truncated_or_malformed_arrays(self):
+        for text in ('[{"id": 1}', '[{"id": 1}, {"id"', '[{"id": 1} {"id": 2}]', '[1,]'):
+            for chunk_size in (1, 4, 1024):
+                with self.subTest(text=text, chunk_size=chunk_size), self.assertRaises(ValueError):
+                    parse(text, chunk_size)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,165 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from task_index import format_due_date, today_ordinal
+from task_storage import open_storage
+from task_store import TaskStore
+
+
+def open_store(path, backend="json"):
+    store = TaskStore(open_storage(backend, path))
+    store.load()
+    return store
+
+
+class TwoStoreTest(unittest.TestCase):
+    """Base for tests of two stores open on one task file in a temporary directory"""
+
+    backend = "json"
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "tasks.json")
+        self.first = open_store(self.path, self.backend)
+        self.second = open_store(self.path, self.backend)
+
+    def tearDown(self):
+        self.first.close()
+        self.second.close()
+        self.directory.cleanup()
+
+
+class SyncClashTest(TwoStoreTest):
+    """Two stores on one task file adding under the same ID"""
+
+    def test_saved_ids_survive_a_clash(self):
+        saved = self.first.add("Saved elsewhere")
+        self.first.save()
+        local = self.second.add("Added here")
+        self.assertEqual(saved["id"], local["id"])
+
+        self.second.save()
+
+        self.assertEqual(self.second.get(saved["id"])["task"], "Saved elsewhere")
+        self.assertNotEqual(local["id"], saved["id"])
+        self.assertIs(self.second.get(local["id"]), local)
+        reread = {task["id"]: task["task"] for task in open_store(self.path).read_saved()}
+        self.assertEqual(reread, {saved["id"]: "Saved elsewhere", local["id"]: "Added here"})
+
+        # The first store keeps its task where it was and picks up the other one
+        added, updated, removed, removed_items = self.first.sync()
+        self.assertEqual([task["id"] for task in added], [local["id"]])
+        self.assertEqual(self.first.get(saved["id"])["task"], "Saved elsewhere")
+
+    def test_clash_is_reported_as_an_update(self):
+        self.first.add("Saved elsewhere")
+        self.first.save()
+        local = self.second.add("Added here")
+
+        added, updated, removed, removed_items = self.second.sync()
+
+        self.assertEqual([task["task"] for task in added], ["Saved elsewhere"])
+        self.assertEqual(updated, [local])
+        self.assertIn(local["id"], self.second.unsaved)
+
+
+class ExternalReadTest(TwoStoreTest):
+    """Parsing another store's save apart from merging it"""
+
+    def test_read_is_merged_later(self):
+        saved = self.first.add("Saved elsewhere")
+        self.first.save()
+
+        external = self.second.read_external()
+        self.assertIsNone(self.second.get(saved["id"]))
+        added, updated, removed, removed_items = self.second.sync(external)
+
+        self.assertEqual([task["task"] for task in added], ["Saved elsewhere"])
+        self.assertIsNone(self.second.read_external())
+
+    def test_read_from_before_a_save_is_dropped(self):
+        self.first.add("Saved elsewhere")
+        self.first.save()
+        external = self.second.read_external()
+        local = self.second.add("Added here")
+        self.second.save()
+
+        self.assertIsNone(self.second.sync(external))
+        self.assertIs(self.second.get(local["id"]), local)
+        self.assertEqual(len(self.second), 2)
+
+
+class SqliteAddTest(TwoStoreTest):
+    """Two stores on one database adding one after the other"""
+
+    backend = "sqlite"
+
+    def test_ids_are_taken_from_the_database(self):
+        first = self.first.add("Added first")
+        self.first.save()
+        second = self.second.add("Added second")
+        self.second.save()
+
+        self.assertNotEqual(first["id"], second["id"])
+        self.assertEqual(open_store(self.path, self.backend).get(first["id"])["task"], "Added first")
+        self.assertEqual(self.first.get(second["id"])["task"], "Added second")
+
+    def test_batches_get_distinct_ids(self):
+        self.first.add_many([{"task": "a"}, {"task": "b"}])
+        self.first.save()
+        tasks = self.second.add_many([{"task": "c"}, {"task": "d"}])
+        self.second.save()
+
+        self.assertEqual(len({task["id"] for task in self.second}), 4)
+        self.assertEqual([task["task"] for task in tasks], ["c", "d"])
+
+
+class AdvanceRecurrencesTest(TwoStoreTest):
+    """A daily task three days behind, advanced once or after a failure"""
+
+    def setUp(self):
+        super().setUp()
+        self.today = today_ordinal()
+        self.task_id = self.first.add("Water plants", due_date=format_due_date(self.today - 3),
+                                      repeat="daily")["id"]
+        self.first.save()
+
+    def saved_rules(self):
+        return {task["due"]: task["repeat"] for task in open_store(self.path, self.backend)}
+
+    def test_latest_occurrence_is_added_once(self):
+        changes, created = self.first.advance_recurrences(self.today)
+        self.assertEqual([(task["due"], task["repeat"]) for task in created], [(self.today, "daily")])
+        self.assertIsNone(self.first.get(self.task_id)["repeat"])
+        self.assertEqual(self.first.advance_recurrences(self.today)[1], [])
+        self.assertEqual(self.first.next_repeat_day(), self.today + 1)
+        self.assertEqual(self.saved_rules(), {self.today - 3: None, self.today: "daily"})
+
+    def test_failed_occurrence_keeps_the_series(self):
+        with mock.patch.object(self.first, "add_occurrence", side_effect=OSError("disk full")), \
+                self.assertRaises(OSError):
+            self.first.advance_recurrences(self.today)
+        self.assertEqual(self.first.get(self.task_id)["repeat"], "daily")
+        self.assertEqual(self.first.next_repeat_day(), self.today - 2)
+
+        changes, created = self.first.advance_recurrences(self.today)
+        self.assertEqual([task["due"] for task in created], [self.today])
+
+    def test_failed_save_keeps_the_series(self):
+        with mock.patch.object(self.first.storage, "save", side_effect=OSError("disk full")), \
+                self.assertRaises(OSError):
+            self.first.advance_recurrences(self.today)
+        # Kept in memory to save again, or rolled back to be advanced again
+        self.first.save()
+        self.first.advance_recurrences(self.today)
+        self.assertEqual(self.saved_rules(), {self.today - 3: None, self.today: "daily"})
+
+
+class SqliteAdvanceRecurrencesTest(AdvanceRecurrencesTest):
+    backend = "sqlite"
+
+
+if __name__ == "__main__":
+    unittest.main()